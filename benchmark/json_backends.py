@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Compares the json backends of pyramid_georest on representative feature payloads. The records are built in
+memory, so only conversion and serialization are measured (no database access).
+
+Usage:
+
+    python benchmark/json_backends.py [number of features]
+"""
+import datetime
+import decimal
+import sys
+import timeit
+
+from geoalchemy2 import Geometry
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point
+from sqlalchemy import Column, Integer, String, Date, DateTime, Numeric
+from sqlalchemy.ext.declarative import declarative_base
+
+from pyramid_georest.lib.description import ModelDescription
+from pyramid_georest.lib.json_backend import JSON_BACKEND_SETTING, JSON_BACKENDS
+from pyramid_georest.lib.renderer import RestfulJson, RestfulGeoJson
+
+Base = declarative_base()
+
+
+class Parcel(Base):
+    __tablename__ = 'parcel'
+    __table_args__ = {'schema': 'cadastre'}
+    id = Column(Integer, primary_key=True)
+    number = Column(String)
+    municipality = Column(String)
+    area = Column(Numeric)
+    valid_from = Column(Date)
+    modified = Column(DateTime)
+    geom = Column(Geometry('POLYGON', srid=2056))
+
+
+class Info(object):
+    def __init__(self, backend_name):
+        self.settings = {JSON_BACKEND_SETTING: backend_name}
+
+
+def parcels(count):
+    records = []
+    for i in range(count):
+        records.append(Parcel(
+            id=i,
+            number='{0}-{1}'.format(2700, i),
+            municipality=u'Liestal',
+            area=decimal.Decimal('1234.56'),
+            valid_from=datetime.date(2019, 1, 1),
+            modified=datetime.datetime(2020, 3, 4, 5, 6, 7),
+            geom=from_shape(Point(2615000 + i, 1264000 + i).buffer(10, 8), srid=2056)
+        ))
+    return records
+
+
+def measure(renderer_class, backend_name, records, model_description, repeat=3):
+    renderer = renderer_class(Info(backend_name))
+    if renderer.json_backend.name != backend_name:
+        return None
+    results = {'features': records, 'model_description': model_description}
+    return min(timeit.repeat(lambda: renderer.to_str(results), number=1, repeat=repeat))
+
+
+def main(count):
+    records = parcels(count)
+    model_description = ModelDescription(Parcel)
+    print('{0} features'.format(count))
+    print('{0:<16}{1:>12}{2:>12}'.format('backend', 'json [s]', 'geojson [s]'))
+    for backend_name in JSON_BACKENDS:
+        timings = [
+            measure(renderer_class, backend_name, records, model_description)
+            for renderer_class in [RestfulJson, RestfulGeoJson]
+        ]
+        if None in timings:
+            print('{0:<16}{1:>24}'.format(backend_name, 'not installed'))
+        else:
+            print('{0:<16}{1:>12.3f}{2:>12.3f}'.format(backend_name, *timings))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -4,7 +4,7 @@ import logging
 from pyramid.config import Configurator
 from pyramid.exceptions import ConfigurationConflictError
 from pyramid_georest.lib.renderer import RestfulJson, RestfulXML, RestfulModelJSON, RestfulModelXML, \
-    RestfulGeoJson
+    RestfulGeoJson, RestfulAggregateJSON, RestfulClusterGeoJSON
 from pyramid_mako import add_mako_renderer
 
 log = logging.getLogger('pyramid_georest')
@@ -49,6 +49,8 @@ def includeme(config):
     config.add_renderer(name='geo_restful_xml', factory=RestfulXML)
     config.add_renderer(name='geo_restful_model_json', factory=RestfulModelJSON)
     config.add_renderer(name='geo_restful_model_xml', factory=RestfulModelXML)
+    config.add_renderer(name='geo_restful_aggregate_json', factory=RestfulAggregateJSON)
+    config.add_renderer(name='geo_restful_cluster_geo_json', factory=RestfulClusterGeoJSON)
 
     # add request attributes
 
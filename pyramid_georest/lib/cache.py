@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache(object):
+
+    def __init__(self, max_size=128, ttl=None):
+        """
+        A small thread safe cache which keeps the most recently used entries in the memory of the process. If
+        it is full, the entry which was not used for the longest time is dropped.
+
+        Args:
+            max_size (int): The maximum number of entries which are kept.
+            ttl (int or None): The number of seconds an entry is valid. Entries never expire if it is None.
+        """
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """
+        Delivers the entry for the key and marks it as recently used.
+
+        Args:
+            key (hashable): The key of the entry.
+            default (object): The value which is returned if there is no entry for the key.
+
+        Returns:
+            object: The cached value or the default.
+        """
+
+        with self._lock:
+            if key not in self._entries:
+                return default
+            created, value = self._entries[key]
+            if self.ttl is not None and time.time() - created >= self.ttl:
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """
+        Adds or replaces the entry for the key.
+
+        Args:
+            key (hashable): The key of the entry.
+            value (object): The value which should be cached.
+        """
+
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all entries.
+        """
+
+        with self._lock:
+            self._entries.clear()
+
+
+class FileCache(object):
+
+    def __init__(self, directory, ttl=None, max_size=1024):
+        """
+        A cache which keeps its entries as files in a directory. It can be shared by all processes of an
+        application on the same machine (e.g. the workers of a WSGI server). The entries have to be picklable.
+        The modification time of a file is the time its entry was written, the access time is the time it
+        was used last.
+
+        Args:
+            directory (str): The directory the entries are written to. It is created if it does not exist.
+                Every cache needs its own directory since clear removes all entries of the directory.
+            ttl (int or None): The number of seconds an entry is valid. Entries never expire if it is None.
+            max_size (int): The maximum number of entries which are kept. If a new entry exceeds it, the
+                expired entries and then the entries which were not used for the longest time are removed.
+        """
+
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size = max_size
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def path_(self, key):
+        return os.path.join(
+            self.directory,
+            hashlib.sha1(repr(key).encode('utf-8')).hexdigest() + '.cache'
+        )
+
+    def get(self, key, default=None):
+        """
+        Delivers the entry for the key.
+
+        Args:
+            key (hashable): The key of the entry.
+            default (object): The value which is returned if there is no valid entry for the key.
+
+        Returns:
+            object: The cached value or the default.
+        """
+
+        path = self.path_(key)
+        try:
+            with open(path, 'rb') as entry:
+                created, value = pickle.load(entry)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            return default
+        now = time.time()
+        if self.ttl is not None and now - created >= self.ttl:
+            self.remove_(path)
+            return default
+        try:
+            # marks the entry as recently used, the modification time keeps the time it was written
+            os.utime(path, (now, os.stat(path).st_mtime))
+        except OSError:
+            pass
+        return value
+
+    def put(self, key, value):
+        """
+        Adds or replaces the entry for the key. The file is replaced atomically, so other processes never read
+        a partially written entry.
+
+        Args:
+            key (hashable): The key of the entry.
+            value (object): The value which should be cached.
+        """
+
+        handle, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(handle, 'wb') as entry:
+            pickle.dump((time.time(), value), entry)
+        os.replace(temporary_path, self.path_(key))
+        self.prune_()
+
+    def prune_(self):
+        """
+        Removes the expired entries and the least recently used ones if there are more than max_size.
+        """
+
+        entries = []
+        now = time.time()
+        for name in os.listdir(self.directory):
+            if not name.endswith('.cache'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if self.ttl is not None and now - stat.st_mtime >= self.ttl:
+                self.remove_(path)
+            else:
+                entries.append((stat.st_atime, path))
+        if len(entries) > self.max_size:
+            entries.sort()
+            for used, path in entries[:len(entries) - self.max_size]:
+                self.remove_(path)
+
+    @staticmethod
+    def remove_(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        """
+        Removes all entries.
+        """
+
+        for name in os.listdir(self.directory):
+            if name.endswith('.cache'):
+                self.remove_(os.path.join(self.directory, name))
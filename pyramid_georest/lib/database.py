@@ -1,13 +1,84 @@
 # -*- coding: utf-8 -*-
-from sqlalchemy import create_engine
+import itertools
+import logging
+import time
+
+from pyramid.settings import asbool
+from sqlalchemy import create_engine, select, literal_column
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import scoped_session
+from sqlalchemy.sql.expression import ClauseElement, Executable
 from sqlalchemy.orm import sessionmaker
 from zope.sqlalchemy import register
 
+log = logging.getLogger('pyramid_georest')
+
+SETTINGS_PREFIX = 'pyramid_georest.'
+
+REPLICA_STRATEGY_ROUND_ROBIN = 'round_robin'
+REPLICA_STRATEGY_LEAST_BUSY = 'least_busy'
+
+POOL_SETTINGS = {
+    'pool_size': int,
+    'max_overflow': int,
+    'pool_pre_ping': asbool,
+    'pool_recycle': int,
+    'pool_timeout': int
+}
+
+
+def pool_settings_from_settings(settings, api_name=None):
+    """
+    Extracts the connection pool configuration from the pyramid settings dictionary. Global values are read
+    from keys like *pyramid_georest.pool_size*. They can be overwritten per api by keys which contain the
+    api name like *pyramid_georest.my_api.pool_size*.
+
+    :param settings: The settings of the hosting pyramid application.
+    :type settings: dict or None
+    :param api_name: The name of the api which the pool settings are obtained for.
+    :type api_name: str or None
+    :return: The pool settings which were found, already converted to their correct types. Settings which
+    were not configured are not part of the result.
+    :rtype: dict
+    """
+
+    pool_settings = {}
+    if not settings:
+        return pool_settings
+    prefixes = [SETTINGS_PREFIX]
+    if api_name:
+        prefixes.append('{0}{1}.'.format(SETTINGS_PREFIX, api_name))
+    for prefix in prefixes:
+        for name, converter in POOL_SETTINGS.items():
+            value = settings.get(prefix + name)
+            if value is not None:
+                pool_settings[name] = converter(value)
+    return pool_settings
+
+
+class Explain(Executable, ClauseElement):
+
+    def __init__(self, statement):
+        """
+        An EXPLAIN statement which delivers the plan of the wrapped statement as json without executing it.
+        It is only supported by PostgreSQL.
+
+        :param statement: The statement which should be explained.
+        :type statement: sqlalchemy.sql.expression.Select
+        """
+        self.statement = statement
+
+
+@compiles(Explain, 'postgresql')
+def compile_explain_postgresql(element, compiler, **kw):
+    return 'EXPLAIN (FORMAT JSON) {0}'.format(compiler.process(element.statement, **kw))
+
 
 class Connection:
 
-    def __init__(self, url):
+    def __init__(self, url, pool_size=1, max_overflow=None, pool_pre_ping=None, pool_recycle=None,
+                 pool_timeout=None):
         """
         Simple wrapper class to have all connection specific stuff in one simple accessible place.
 
@@ -15,11 +86,120 @@ class Connection:
         It must have the form as described here:
         http://docs.sqlalchemy.org/en/latest/core/engines.html
         :type url: str
+        :param pool_size: The number of connections which are kept open in the pool.
+        :type pool_size: int
+        :param max_overflow: The number of connections which may be opened in addition to the pool_size when
+        the pool is exhausted. It is only passed to the engine if it is set.
+        :type max_overflow: int or None
+        :param pool_pre_ping: Whether connections are tested for liveness on each checkout. It is only passed
+        to the engine if it is set.
+        :type pool_pre_ping: bool or None
+        :param pool_recycle: The number of seconds after which a connection is recycled. It is only passed to
+        the engine if it is set.
+        :type pool_recycle: int or None
+        :param pool_timeout: The number of seconds to wait for a connection on checkout before giving up. It
+        is only passed to the engine if it is set.
+        :type pool_timeout: int or None
         """
         self.url = url
+        self.pool_settings = {'pool_size': pool_size}
+        optional_pool_settings = {
+            'max_overflow': max_overflow,
+            'pool_pre_ping': pool_pre_ping,
+            'pool_recycle': pool_recycle,
+            'pool_timeout': pool_timeout
+        }
+        for name, value in optional_pool_settings.items():
+            if value is not None:
+                self.pool_settings[name] = value
         if 'cx_oracle' in self.url:
-            self.engine = create_engine(self.url, pool_size=1, coerce_to_unicode=True)
+            self.engine = create_engine(self.url, coerce_to_unicode=True, **self.pool_settings)
         else:
-            self.engine = create_engine(self.url, pool_size=1)
+            self.engine = create_engine(self.url, **self.pool_settings)
         self.session = scoped_session(sessionmaker(bind=self.engine))
         register(self.session)
+        self.healthy = True
+        self.last_health_check = None
+
+    def is_healthy(self, interval=30):
+        """
+        Checks whether the database behind this connection is reachable. The result of the check is kept for
+        the passed interval, so the database is not pinged on every request.
+
+        :param interval: The number of seconds a health check result is considered to be valid.
+        :type interval: int
+        :return: Whether the database was reachable on the last check.
+        :rtype: bool
+        """
+        now = time.time()
+        if self.last_health_check is None or now - self.last_health_check >= interval:
+            self.last_health_check = now
+            try:
+                with self.engine.connect() as connection:
+                    connection.scalar(select([literal_column('1')]))
+                self.healthy = True
+            except SQLAlchemyError as e:
+                log.error('Health check failed for connection {url}: {error}'.format(
+                    url=repr(self.engine.url), error=e)
+                )
+                self.healthy = False
+        return self.healthy
+
+    def checked_out(self):
+        """
+        Delivers the number of connections which are currently in use. Pools which do not track this are
+        reported with 0.
+
+        :return: The number of checked out connections of the pool.
+        :rtype: int
+        """
+        checked_out = getattr(self.engine.pool, 'checkedout', None)
+        if checked_out is None:
+            return 0
+        return checked_out()
+
+
+class ReplicaPool(object):
+
+    def __init__(self, connections, strategy=REPLICA_STRATEGY_ROUND_ROBIN, health_check_interval=30):
+        """
+        Holds the connections to read replicas of a database and decides which one is used for the next read
+        request. Replicas which are not reachable are skipped until their next health check succeeds.
+
+        :param connections: The connections to the replica databases.
+        :type connections: list of Connection
+        :param strategy: How a replica is chosen. This is whether 'round_robin' or 'least_busy' (the replica
+        with the fewest checked out connections).
+        :type strategy: str
+        :param health_check_interval: The number of seconds a health check result of a replica is valid.
+        :type health_check_interval: int
+        :raises ValueError: If the strategy is not known.
+        """
+        if strategy not in [REPLICA_STRATEGY_ROUND_ROBIN, REPLICA_STRATEGY_LEAST_BUSY]:
+            raise ValueError('The replica strategy "{strategy}" is not implemented.'.format(
+                strategy=strategy
+            ))
+        self.connections = connections
+        self.strategy = strategy
+        self.health_check_interval = health_check_interval
+        self._counter = itertools.count()
+
+    def choose(self):
+        """
+        Chooses a healthy replica connection according to the configured strategy.
+
+        :return: The chosen connection or None if no replica is healthy.
+        :rtype: Connection or None
+        """
+        if len(self.connections) == 0:
+            return None
+        if self.strategy == REPLICA_STRATEGY_LEAST_BUSY:
+            candidates = sorted(self.connections, key=lambda connection: connection.checked_out())
+        else:
+            start = next(self._counter) % len(self.connections)
+            candidates = self.connections[start:] + self.connections[:start]
+        for connection in candidates:
+            if connection.is_healthy(self.health_check_interval):
+                return connection
+        log.warning('No healthy replica found, falling back to the primary connection.')
+        return None
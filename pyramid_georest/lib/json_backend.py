@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+import codecs
+import datetime
+import decimal
+import logging
+
+import simplejson
+
+log = logging.getLogger('pyramid_georest')
+
+JSON_BACKEND_SETTING = 'pyramid_georest.json_backend'
+
+
+class SimpleJsonBackend(object):
+    """
+    The default json backend which uses simplejson. All other backends fall back to this one if they are not
+    installed.
+    """
+
+    name = 'simplejson'
+
+    native_types = ()
+    """tuple of type: The python types which are serialized by the backend itself without any formatter."""
+
+    @staticmethod
+    def dumps(value):
+        """
+        Serializes the value to a json string.
+
+        Args:
+            value (object): The value which should be serialized.
+
+        Returns:
+            str: The json string.
+        """
+
+        return simplejson.dumps(value)
+
+    @staticmethod
+    def raw(text):
+        """
+        Wraps already serialized json text, so it is written to the output as it is by :py:meth:`dumps`.
+
+        Args:
+            text (str): The serialized json text.
+
+        Returns:
+            object: The wrapped text.
+        """
+
+        return simplejson.RawJSON(text)
+
+
+class OrJsonBackend(SimpleJsonBackend):
+    """
+    A json backend which uses orjson. It serializes dates and times itself.
+    """
+
+    name = 'orjson'
+    native_types = (datetime.date, datetime.time)
+
+    def __init__(self):
+        import orjson
+        self.orjson = orjson
+
+    def dumps(self, value):
+        return self.orjson.dumps(value, default=self.default_).decode('utf-8')
+
+    def raw(self, text):
+        # orjson.Fragment exists since orjson 3.9, older versions have to parse the text
+        fragment = getattr(self.orjson, 'Fragment', None)
+        if fragment is None:
+            return self.orjson.loads(text)
+        return fragment(text)
+
+    @staticmethod
+    def default_(value):
+        if isinstance(value, decimal.Decimal):
+            return float(value)
+        raise TypeError('Type is not JSON serializable: {0}'.format(type(value).__name__))
+
+
+class UJsonBackend(SimpleJsonBackend):
+    """
+    A json backend which uses ujson. It serializes decimals itself.
+    """
+
+    name = 'ujson'
+    native_types = (decimal.Decimal,)
+
+    def __init__(self):
+        import ujson
+        self.ujson = ujson
+
+    def dumps(self, value):
+        return self.ujson.dumps(value, ensure_ascii=False, escape_forward_slashes=False)
+
+    def raw(self, text):
+        # ujson has no way to embed serialized text, it has to be parsed
+        return self.ujson.loads(text)
+
+
+JSON_BACKENDS = {
+    SimpleJsonBackend.name: SimpleJsonBackend,
+    OrJsonBackend.name: OrJsonBackend,
+    UJsonBackend.name: UJsonBackend
+}
+
+_json_backends = {}
+
+
+def get_json_backend(name=None):
+    """
+    Delivers the json backend with the passed name. If it is not known or its library is not installed, the
+    simplejson backend is used. The backends are created only once.
+
+    Args:
+        name (str or None): The name of the backend. This is whether simplejson, orjson or ujson.
+
+    Returns:
+        SimpleJsonBackend: The json backend.
+    """
+
+    if name is None:
+        name = SimpleJsonBackend.name
+    backend = _json_backends.get(name)
+    if backend is None:
+        backend_class = JSON_BACKENDS.get(name)
+        if backend_class is None:
+            log.warning('The json backend "{name}" is not known, simplejson is used.'.format(name=name))
+            backend_class = SimpleJsonBackend
+        try:
+            backend = backend_class()
+        except ImportError:
+            log.warning('The json backend "{name}" is not installed, simplejson is used.'.format(name=name))
+            backend = SimpleJsonBackend()
+        _json_backends[name] = backend
+    return backend
+
+
+def json_backend_from_settings(settings):
+    """
+    Delivers the json backend which is configured in the pyramid settings with the key
+    *pyramid_georest.json_backend*.
+
+    Args:
+        settings (dict or None): The settings of the hosting pyramid application.
+
+    Returns:
+        SimpleJsonBackend: The json backend.
+    """
+
+    if not settings:
+        return get_json_backend()
+    return get_json_backend(settings.get(JSON_BACKEND_SETTING))
+
+
+class JsonArrayReader(object):
+
+    whitespace = ' \t\n\r'
+
+    def __init__(self, stream, chunk_size=65536):
+        """
+        Reads the items of a json array from a file like object one after the other, so a huge document is
+        never held in memory completely. Only the current item and one chunk of the stream are buffered.
+        The array is whether the document itself or a member of the top level object (e.g. the *features*
+        of a GeoJSON FeatureCollection). The other members of the object are parsed and dropped.
+
+        Args:
+            stream (file): The binary stream containing the utf-8 encoded json document.
+            chunk_size (int): The number of bytes which are read from the stream at once.
+        """
+
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = simplejson.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.position = 0
+        self.exhausted = False
+
+    def items(self, key=None):
+        """
+        Delivers the items of the array.
+
+        Args:
+            key (str or None): The member of the top level object which contains the array. If it is None,
+                the document has to be an array. If the document is an array although a key was passed, its
+                items are delivered too.
+
+        Returns:
+            generator: The parsed items.
+
+        Raises:
+            ValueError: If the document is no valid json or the array was not found.
+        """
+
+        character = self.next_character_()
+        if character == '[':
+            return self.array_items_()
+        if character == '{' and key is not None:
+            self.position += 1
+            while True:
+                character = self.next_character_()
+                if character == '}':
+                    break
+                member = self.value_()
+                self.expect_(':')
+                if member == key:
+                    if self.next_character_() != '[':
+                        raise ValueError('The member "{key}" is no array.'.format(key=key))
+                    return self.array_items_()
+                self.value_()
+                if self.next_character_() == ',':
+                    self.position += 1
+        raise ValueError('The json document does not contain the array.')
+
+    def array_items_(self):
+        self.position += 1
+        if self.next_character_() == ']':
+            return
+        while True:
+            yield self.value_()
+            character = self.next_character_()
+            self.position += 1
+            if character == ']':
+                return
+            if character != ',':
+                raise ValueError('Expected "," or "]" at position {0} of the array.'.format(self.position))
+
+    def fill_(self, size):
+        if self.exhausted:
+            return False
+        chunk = self.stream.read(size)
+        # the parsed part of the buffer is not needed anymore
+        self.buffer = self.buffer[self.position:]
+        self.position = 0
+        if not chunk:
+            self.exhausted = True
+            self.buffer += self.text_decoder.decode(b'', final=True)
+            return False
+        self.buffer += self.text_decoder.decode(chunk)
+        return True
+
+    def next_character_(self):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in self.whitespace:
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill_(self.chunk_size):
+                raise ValueError('The json document ended unexpectedly.')
+
+    def expect_(self, character):
+        if self.next_character_() != character:
+            raise ValueError('Expected "{0}" in the json document.'.format(character))
+        self.position += 1
+
+    def value_(self):
+        self.next_character_()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except simplejson.JSONDecodeError as e:
+                # errors at the end of the buffer (a cut literal or escape sequence is at most six characters
+                # long) mean that the value continues in the next chunk, all others fail immediately
+                incomplete = e.msg.startswith('Unterminated string') or e.pos >= len(self.buffer) - 6
+                # the buffer grows at least by the size of the incomplete value to keep parsing linear
+                if incomplete and self.fill_(max(self.chunk_size, len(self.buffer) - self.position)):
+                    continue
+                raise
+            # a number at the end of the buffer might continue in the next chunk
+            if end == len(self.buffer) and self.fill_(self.chunk_size):
+                continue
+            self.position = end
+            return value
@@ -1,20 +1,49 @@
 # -*- coding: utf-8 -*-
 import decimal
-import simplejson
 import datetime
 import logging
+import weakref
 
 import dicttoxml
 from geoalchemy2 import WKBElement
 from geoalchemy2.shape import to_shape
 from pyramid.httpexceptions import HTTPNotFound, HTTPServerError
 from pyramid.renderers import JSON, render_to_response
+from pyramid_georest.lib.json_backend import get_json_backend, json_backend_from_settings
 
 from sqlalchemy.ext.associationproxy import _AssociationList
+from sqlalchemy.types import TypeDecorator
 
 
 log = logging.getLogger('pyramid_georest')
 
+DATABASE_GEOJSON_LABEL = 'pyramid_georest_geojson_geometry'
+
+
+def render_json_text(request, text):
+    """
+    Delivers already serialized json text as response the same way the json renderers do it. This is used
+    when the document was already built elsewhere (e.g. by the database).
+
+    Args:
+        request (pyramid.request.Request): The request which comes all the way through the application
+            from the client
+        text (str): The serialized json document.
+
+    Returns:
+        pyramid.response.Response: An pyramid response object.
+    """
+
+    callback = request.GET.get('callback')
+    response = request.response
+    if callback is None:
+        response.content_type = 'application/json'
+        response.text = text
+    else:
+        response.content_type = 'application/javascript'
+        response.text = '%s(%s);' % (callback, text)
+    return response
+
 
 def get_mapping_from_request(request):
     if request.params is not None:
@@ -23,6 +52,53 @@ def get_mapping_from_request(request):
         return None
 
 
+class StreamingAppIter(object):
+
+    def __init__(self, iterable):
+        """
+        A WSGI app_iter which wraps the chunks of a streamed response. Since the response is written after the
+        request was finished by pyramid, everything which has to live as long as the response is written
+        (e.g. the database session) can register a callback which is called when the server closes the
+        app_iter.
+
+        Args:
+            iterable (iterable of bytes): The chunks of the response body.
+        """
+
+        self.iterable = iterable
+        self.completed = False
+        self._close_callbacks = []
+
+    def __iter__(self):
+        for chunk in self.iterable:
+            yield chunk
+        self.completed = True
+
+    def add_close_callback(self, callback):
+        """
+        Adds a callback which is called when the app_iter is closed.
+
+        Args:
+            callback (callable): The callback. It receives one argument which is True if all chunks were
+                written and False otherwise.
+        """
+
+        self._close_callbacks.append(callback)
+
+    def close(self):
+        """
+        Closes the wrapped iterable and calls the registered callbacks. This is called by the WSGI server.
+        """
+
+        try:
+            close = getattr(self.iterable, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            for callback in self._close_callbacks:
+                callback(self.completed)
+
+
 class RenderProxy(object):
 
     def __init__(self):
@@ -47,7 +123,7 @@ class RenderProxy(object):
             'geojson': 'geo_restful_geo_json'
         }
 
-    def render(self, request, result, model_description):
+    def render(self, request, result, model_description, stream=False, fields=None):
         """
         Execute the rendering process by matching the requested format to the mapped renderer. If no
         renderer could be found a error is raised.
@@ -55,10 +131,14 @@ class RenderProxy(object):
         Args:
             request (pyramid.request.Request): The request which comes all the way through the application
                 from the client
-            result (list of sqlalchemy.ext.declarative.DeclarativeMeta): A list of database records found for
-                the request.
+            result (list of sqlalchemy.ext.declarative.DeclarativeMeta or sqlalchemy.orm.query.Query): A list
+                of database records found for the request or a query which delivers them when it is iterated.
             model_description (pyramid_georest.lib.description.ModelDescription): The description object of
                 the data set which will be rendered.
+            stream (bool): Whether the renderer should write the records to the response while they are
+                fetched instead of building the whole body in memory.
+            fields (list of str or None): The names of the columns which should be rendered. All columns are
+                rendered if it is None.
 
         Returns:
             pyramid.response.Response: An pyramid response object.
@@ -74,7 +154,9 @@ class RenderProxy(object):
                 renderer_name,
                 {
                     'features': result,
-                    'model_description': model_description
+                    'model_description': model_description,
+                    'stream': stream,
+                    'fields': fields
                 },
                 request=request
             )
@@ -202,6 +284,14 @@ class RestfulJson(JSON):
     delivers additional methods.
     """
 
+    stream_chunk_size = 500
+    """int: The number of records which are collected into one chunk when the response is streamed."""
+
+    json_backend = get_json_backend()
+    """pyramid_georest.lib.json_backend.SimpleJsonBackend: The backend which serializes to json."""
+
+    _column_converters_cache = weakref.WeakKeyDictionary()
+
     def __init__(self, info):
         """ Constructor: info will be an object having the
         following attributes: name (the renderer name), package
@@ -209,6 +299,7 @@ class RestfulJson(JSON):
         renderer was registered), type (the renderer type
         name), registry (the current application registry) and
         settings (the deployment settings dictionary). """
+        self.json_backend = json_backend_from_settings(getattr(info, 'settings', None))
 
     def __call__(self, results, system):
         """ Call the renderer implementation with the value
@@ -223,16 +314,20 @@ class RestfulJson(JSON):
         """
 
         request = system['request']
-        # here the results will be serialized!!!!
-        val = self.to_str(results)
-
         callback = request.GET.get('callback')
-        if callback is None:
-            ct = 'application/json'
-            body = val
+        if results.get('stream'):
+            # here the results will be serialized while the response is written!!!!
+            body = StreamingAppIter(self.encode_chunks_(self.to_str_iter(results), callback))
+            ct = 'application/json' if callback is None else 'application/javascript'
         else:
-            ct = 'application/javascript'
-            body = '%s(%s);' % (callback, val)
+            # here the results will be serialized!!!!
+            val = self.to_str(results)
+            if callback is None:
+                ct = 'application/json'
+                body = val
+            else:
+                ct = 'application/javascript'
+                body = '%s(%s);' % (callback, val)
         response = request.response
         if response.content_type == response.default_content_type:
             response.content_type = ct
@@ -249,7 +344,72 @@ class RestfulJson(JSON):
             str: The serialized string containing database records.
         """
 
-        return simplejson.dumps(self.column_values_as_serializable(results))
+        return self.json_backend.dumps(self.column_values_as_serializable(results))
+
+    def to_str_iter(self, results):
+        """
+        Translates result dictionary into string fragments which together form the same document as
+        :py:meth:`to_str` does. The records are consumed one by one, so they are never held in memory all
+        together.
+
+        Args:
+            results (dict): The database records wrapped in a dictionary.
+
+        Yields:
+            str: The next fragment of the serialized records.
+        """
+
+        model_description = results.get('model_description')
+        converters = self.column_converters(model_description, results.get('fields'))
+        yield '['
+        for fragment in self.join_chunks_(
+                self.json_backend.dumps(self.record_as_serializable(result, model_description, converters))
+                for result in results.get('features')):
+            yield fragment
+        yield ']'
+
+    def join_chunks_(self, serialized_records):
+        """
+        Collects the serialized records into comma separated chunks of :py:attr:`stream_chunk_size` records.
+
+        Args:
+            serialized_records (iterable of str): The records which are already serialized.
+
+        Yields:
+            str: The next chunk of records.
+        """
+
+        separator = ''
+        chunk = []
+        for serialized_record in serialized_records:
+            chunk.append(serialized_record)
+            if len(chunk) >= self.stream_chunk_size:
+                yield separator + ','.join(chunk)
+                separator = ','
+                chunk = []
+        if len(chunk) > 0:
+            yield separator + ','.join(chunk)
+
+    @staticmethod
+    def encode_chunks_(chunks, callback=None):
+        """
+        Encodes the string fragments of a streamed response and wraps them into the JSONP callback if one
+        was requested.
+
+        Args:
+            chunks (iterable of str): The fragments of the response.
+            callback (str or None): The name of the JSONP callback.
+
+        Yields:
+            bytes: The next encoded fragment.
+        """
+
+        if callback is not None:
+            yield '{callback}('.format(callback=callback).encode('utf-8')
+        for chunk in chunks:
+            yield chunk.encode('utf-8')
+        if callback is not None:
+            yield b');'
 
     def column_values_as_serializable(self, results):
         """
@@ -265,24 +425,123 @@ class RestfulJson(JSON):
 
         serializable_results = []
         model_description = results.get('model_description', False)
+        converters = self.column_converters(model_description, results.get('fields'))
         results = results.get('features', False)
         for result in results:
-            result_dict = {}
-            column_description = model_description.column_descriptions
-            for column_name in column_description:
-                value = getattr(result, column_name)
-                if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
-                    value = self.date_formatter(value)
-                elif isinstance(value, _AssociationList):
-                    value = self.association_formatter(value)
-                elif isinstance(value, WKBElement):
-                    value = self.geometry_formatter(value)
-                elif isinstance(value, decimal.Decimal):
-                    value = self.float_formatter(value)
-                result_dict[column_name] = value
-            serializable_results.append(result_dict)
+            serializable_results.append(self.record_as_serializable(result, model_description, converters))
         return serializable_results
 
+    def record_as_serializable(self, result, model_description, converters=None):
+        """
+        Transforms the values of one database record to serializable representations.
+
+        Args:
+            result (sqlalchemy.ext.declarative.DeclarativeMeta): The database record.
+            model_description (pyramid_georest.lib.description.ModelDescription): The description of the
+                records model.
+            converters (list of tuple or None): The column converters which are used (see
+                :py:meth:`column_converters`). All columns of the model are converted if it is None.
+
+        Returns:
+            dict: The record with serializable values.
+        """
+
+        if converters is None:
+            converters = self.column_converters(model_description)
+        result_dict = {}
+        for column_name, converter in converters:
+            value = getattr(result, column_name)
+            if converter is not None and value is not None:
+                value = converter(value)
+            result_dict[column_name] = value
+        return result_dict
+
+    def column_converters(self, model_description, fields=None):
+        """
+        Delivers the converter of every column of the model. They are decided once per model description,
+        renderer class and json backend from the column types and reused for every record afterwards.
+
+        Args:
+            model_description (pyramid_georest.lib.description.ModelDescription): The description of the
+                records model.
+            fields (list of str or None): The names of the columns which are rendered. All columns are
+                rendered if it is None.
+
+        Returns:
+            list of tuple: The pairs of column name and converter. The converter is None for columns which
+                values are serializable as they are.
+        """
+
+        converters_by_class = self._column_converters_cache.setdefault(model_description, {})
+        key = (self.__class__, self.json_backend.name)
+        converters = converters_by_class.get(key)
+        if converters is None:
+            converters = [
+                (column_name, self.column_converter(model_description, column_name))
+                for column_name in model_description.column_descriptions
+            ]
+            converters_by_class[key] = converters
+        if fields is not None:
+            converters = [(column_name, converter) for column_name, converter in converters
+                          if column_name in fields]
+        return converters
+
+    def column_converter(self, model_description, column_name):
+        """
+        Decides which formatter is used for the values of one column by its type. Types which the json
+        backend serializes itself are not formatted. If the python type of the column is not known, the
+        values are formatted by :py:meth:`value_formatter`.
+
+        Args:
+            model_description (pyramid_georest.lib.description.ModelDescription): The description of the
+                records model.
+            column_name (str): The name of the column.
+
+        Returns:
+            callable or None: The formatter for the values of the column. None if they are serializable as
+                they are.
+        """
+
+        if model_description.column_descriptions[column_name].get('is_geometry_column'):
+            return self.geometry_formatter
+        column_type = model_description.column_classes[column_name].type
+        if isinstance(column_type, TypeDecorator):
+            return self.value_formatter
+        try:
+            python_type = column_type.python_type
+        except NotImplementedError:
+            return self.value_formatter
+        if issubclass(python_type, self.json_backend.native_types):
+            return None
+        elif issubclass(python_type, (datetime.date, datetime.time)):
+            return self.date_formatter
+        elif issubclass(python_type, decimal.Decimal):
+            return self.float_formatter
+        elif issubclass(python_type, (str, int, float, bool)):
+            return None
+        return self.value_formatter
+
+    def value_formatter(self, value):
+        """
+        Formats a value of unknown type by checking its type.
+
+        Args:
+            value (object): The value which should be converted.
+
+        Returns:
+            object: The serializable value.
+        """
+
+        if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+            value = self.date_formatter(value)
+        elif isinstance(value, _AssociationList):
+            value = self.association_formatter(value)
+        elif isinstance(value, WKBElement):
+            value = self.geometry_formatter(value)
+        elif isinstance(value, decimal.Decimal):
+            value = self.float_formatter(value)
+        return value
+
     @staticmethod
     def date_formatter(date):
         """
@@ -340,6 +599,60 @@ class RestfulJson(JSON):
         return float(number)
 
 
+class RestfulAggregateJSON(RestfulJson):
+    """
+    This represents a standard pyramid renderer which renders the rows of an aggregation (a list of
+    dictionaries) to json.
+    """
+
+    def to_str(self, results):
+        """
+        Translates the aggregated rows into a string.
+
+        Args:
+            results (dict): The aggregated rows wrapped in a dictionary.
+
+        Returns:
+            str: The serialized string containing the aggregated rows.
+        """
+
+        return self.json_backend.dumps([
+            dict((key, value if value is None else self.value_formatter(value)) for key, value in row.items())
+            for row in results.get('rows')
+        ])
+
+
+class RestfulClusterGeoJSON(RestfulAggregateJSON):
+    """
+    This represents a standard pyramid renderer which renders the clusters of a cluster request (a list of
+    dictionaries with the coordinates *x* and *y* of the cluster center and the number of records *count*)
+    to a GeoJSON FeatureCollection of points.
+    """
+
+    def to_str(self, results):
+        """
+        Translates the clusters into a string.
+
+        Args:
+            results (dict): The clusters wrapped in a dictionary.
+
+        Returns:
+            str: The serialized GeoJSON FeatureCollection.
+        """
+
+        return self.json_backend.dumps({
+            'type': 'FeatureCollection',
+            'features': [
+                {
+                    'type': 'Feature',
+                    'geometry': {'type': 'Point', 'coordinates': [row.get('x'), row.get('y')]},
+                    'properties': {'count': row.get('count')}
+                }
+                for row in results.get('rows')
+            ]
+        })
+
+
 class RestfulGeoJson(RestfulJson):
     """
         This represents a standard pyramid renderer which can consume a list of database instances and
@@ -371,33 +684,87 @@ class RestfulGeoJson(RestfulJson):
 
         serializable_results = []
         model_description = results.get('model_description', False)
+        converters = self.column_converters(model_description, results.get('fields'))
         results = results.get('features', False)
         for result in results:
-            geometry = {}
-            properties = {}
-            result_dict = {
-                "type": "Feature",
-                "geometry": geometry,
-                "properties": properties
-            }
-            for column_name in model_description.column_descriptions:
-                value = getattr(result, column_name)
-                if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
-                    value = self.date_formatter(value)
-                elif isinstance(value, _AssociationList):
-                    value = self.association_formatter(value)
-                elif isinstance(value, WKBElement):
-                    result_dict['geometry'] = self.geometry_formatter(value)
-                    continue
-                elif isinstance(value, decimal.Decimal):
-                    value = self.float_formatter(value)
-                properties[column_name] = value
-            serializable_results.append(result_dict)
+            serializable_results.append(self.record_as_serializable(result, model_description, converters))
         return {
             "type": "FeatureCollection",
             "features": serializable_results
         }
 
+    def record_as_serializable(self, result, model_description, converters=None):
+        """
+        Transforms one database record to a serializable GeoJSON Feature.
+
+        Args:
+            result (sqlalchemy.ext.declarative.DeclarativeMeta or tuple): The database record. If the
+                geometry was encoded to GeoJSON by the database, this is a row of the record and the
+                GeoJSON text labeled with DATABASE_GEOJSON_LABEL.
+            model_description (pyramid_georest.lib.description.ModelDescription): The description of the
+                records model.
+            converters (list of tuple or None): The column converters which are used (see
+                :py:meth:`column_converters`). All columns of the model are converted if it is None.
+
+        Returns:
+            dict: The record as GeoJSON Feature with serializable values.
+        """
+
+        geometry = {}
+        properties = {}
+        result_dict = {
+            "type": "Feature",
+            "geometry": geometry,
+            "properties": properties
+        }
+        skipped_column_names = []
+        if isinstance(result, tuple):
+            # the geometry was already encoded by the database (see Service.geojson_in_database), it is
+            # spliced into the output without parsing it again
+            database_geometry = getattr(result, DATABASE_GEOJSON_LABEL)
+            result = result[0]
+            if database_geometry is None:
+                result_dict['geometry'] = None
+            else:
+                result_dict['geometry'] = self.json_backend.raw(database_geometry)
+            skipped_column_names = model_description.geometry_column_names
+        if converters is None:
+            converters = self.column_converters(model_description)
+        geometry_columns = model_description.geometry_columns
+        for column_name, converter in converters:
+            if column_name in skipped_column_names:
+                continue
+            value = getattr(result, column_name)
+            if converter is not None and value is not None:
+                if column_name in geometry_columns:
+                    result_dict['geometry'] = converter(value)
+                    continue
+                value = converter(value)
+            properties[column_name] = value
+        return result_dict
+
+    def to_str_iter(self, results):
+        """
+        Translates result dictionary into string fragments of a GeoJSON FeatureCollection. The header of the
+        collection is delivered first, then every Feature as soon as its record was fetched and finally the
+        footer. So the collection is never held in memory as a whole.
+
+        Args:
+            results (dict): The database records wrapped in a dictionary.
+
+        Yields:
+            str: The next fragment of the FeatureCollection.
+        """
+
+        model_description = results.get('model_description')
+        converters = self.column_converters(model_description, results.get('fields'))
+        yield '{"type": "FeatureCollection", "features": ['
+        for fragment in self.join_chunks_(
+                self.json_backend.dumps(self.record_as_serializable(result, model_description, converters))
+                for result in results.get('features')):
+            yield fragment
+        yield ']}'
+
     @staticmethod
     def geometry_type_formatter(geometry):
         """
@@ -540,6 +907,7 @@ class RestfulModelJSON(JSON):
         renderer was registered), type (the renderer type
         name), registry (the current application registry) and
         settings (the deployment settings dictionary). """
+        self.json_backend = json_backend_from_settings(getattr(info, 'settings', None))
 
     def __call__(self, model_description, system):
         """ Call the renderer implementation with the value
@@ -550,7 +918,7 @@ class RestfulModelJSON(JSON):
         (e.g. view, context, and request). """
 
         request = system['request']
-        val = simplejson.dumps(model_description.as_dict())
+        val = self.json_backend.dumps(model_description.as_dict())
         # print val
         callback = request.GET.get('callback')
         if callback is None:
@@ -1,29 +1,75 @@
 # -*- coding: utf-8 -*-
+import base64
+import binascii
+import datetime
+import decimal
+import functools
+import itertools
 import logging
 
+import simplejson
 import six
 import transaction
-from pyramid.httpexceptions import HTTPNotFound, HTTPBadRequest
+from pyramid.httpexceptions import HTTPNotFound, HTTPBadRequest, HTTPNotModified
 from pyramid.renderers import render_to_response
+from pyramid.response import Response
+from pyramid.settings import asbool
+from pyramid_georest.lib.cache import LRUCache
 from pyramid_georest.lib.description import ModelDescription
-from pyramid_georest.lib.renderer import RenderProxy, AdapterProxy
-from pyramid_georest.lib.database import Connection
+from pyramid_georest.lib.json_backend import JsonArrayReader
+from pyramid_georest.lib.renderer import RenderProxy, AdapterProxy, StreamingAppIter, \
+    DATABASE_GEOJSON_LABEL, render_json_text
+from pyramid_georest.lib.database import Connection, ReplicaPool, Explain, pool_settings_from_settings, \
+    REPLICA_STRATEGY_ROUND_ROBIN
 from pyramid_georest.routes import create_api_routing, check_route_prefix
-from sqlalchemy import or_, and_, cast, String, desc, asc
-from sqlalchemy.sql.expression import text
-from sqlalchemy.orm.exc import MultipleResultsFound
+from sqlalchemy import or_, and_, cast, String, Text, desc, asc, func, literal_column, literal, tuple_, \
+    bindparam
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
+from sqlalchemy.orm import defer, load_only, class_mapper, selectinload, joinedload
+from sqlalchemy.sql.expression import text, select
+from sqlalchemy.util import KeyedTuple
 from geoalchemy2 import WKTElement
+from shapely import wkt
+from shapely.errors import WKTReadingError
 from shapely.geometry import asShape
+from zope.sqlalchemy import mark_changed
 
 log = logging.getLogger('pyramid_georest')
 
 DIRECTION_ASC = ['ASC', 'asc', 'ascending']
 DIRECTION_DESC = ['DESC', 'desc', 'descending']
+DATABASE_RENDERED_FORMATS = ['json', 'geojson']
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+TOTAL_COUNT_HEADER = 'X-Total-Count'
+TOTAL_COUNT_LABEL = 'pyramid_georest_total_count'
+CURSOR_DATE_FORMAT = '%Y-%m-%d'
+CURSOR_TIME_FORMAT = '%H:%M:%S.%f'
+CURSOR_DATETIME_FORMAT = '{0}T{1}'.format(CURSOR_DATE_FORMAT, CURSOR_TIME_FORMAT)
+COUNT_MODE_EXACT = 'exact'
+COUNT_MODE_ESTIMATED = 'estimated'
+COUNT_MODES = [COUNT_MODE_EXACT, COUNT_MODE_ESTIMATED]
+CLUSTER_RENDERERS = {
+    'json': 'geo_restful_aggregate_json',
+    'geojson': 'geo_restful_cluster_geo_json'
+}
+AGGREGATE_FUNCTIONS = {
+    'count': func.count,
+    'sum': func.sum,
+    'avg': func.avg,
+    'min': func.min,
+    'max': func.max
+}
+EXPAND_STRATEGY_SELECTIN = 'selectin'
+EXPAND_STRATEGY_JOINED = 'joined'
+EXPAND_STRATEGIES = {
+    EXPAND_STRATEGY_SELECTIN: selectinload,
+    EXPAND_STRATEGY_JOINED: joinedload
+}
 
 
 class Clause(object):
 
-    def __init__(self, definition, model_description):
+    def __init__(self, definition, model_description, bbox_prefilter=False):
         """
         The class which represents the clause block.
 
@@ -31,11 +77,16 @@ class Clause(object):
             definition (dict): The values which are assigned to the object.
             model_description (pyramid_georest.lib.description.ModelDescription): The description of the model
                 which is being filtered.
+            bbox_prefilter (bool): Whether geometric clauses are combined with a bounding box comparison
+                (&&) of the column and the passed geometry. This lets the database use the spatial index
+                even for clauses which can't use it on their own.
         Raises:
             HTTPBadRequest
         """
 
         self.model_description = model_description
+        self.bbox_prefilter = bbox_prefilter
+        self.input_geometry = None
 
         if definition.get('column_name'):
             self.column_name = definition.get('column_name')
@@ -54,6 +105,7 @@ class Clause(object):
             )
 
         self.value = definition.get('value')
+        self.distance = definition.get('distance')
 
         if self.column_description.get('is_geometry_column'):
             self.clause_construct = self.decide_multi_geometries()
@@ -93,7 +145,10 @@ class Clause(object):
         elif self.operator == 'LIKE':
             clause = cast(self.column, String()).like(self.value)
         elif self.operator == 'IN':
-            clause = self.column.in_(str(self.value).split(','))
+            if isinstance(self.value, list):
+                clause = self.column.in_(self.value)
+            else:
+                clause = self.column.in_(str(self.value).split(','))
         elif self.operator == 'NULL':
             clause = self.column == None  # noqa: E711
         elif self.operator == 'NOT_NULL':
@@ -149,7 +204,11 @@ class Clause(object):
         ]
         db_path = '.'.join(db_path_list)
         srid = self.column_description.get('srid')
-        if geometry_type == 'GEOMETRYCOLLECTION' and 'GEOMETRYCOLLECTION' not in self.value:
+        if self.operator == 'BBOX':
+            return self.decide_bbox_operation(srid)
+        elif self.operator == 'DWITHIN':
+            return self.decide_dwithin_operation(srid)
+        elif geometry_type == 'GEOMETRYCOLLECTION' and 'GEOMETRYCOLLECTION' not in self.value:
             clause_construct = self.extract_geometry_collection_db(db_path, srid)
         elif 'GEOMETRYCOLLECTION' in self.value and geometry_type != 'GEOMETRYCOLLECTION':
             clause_construct = self.extract_geometry_collection_input(db_path, srid)
@@ -167,8 +226,61 @@ class Clause(object):
                             value=self.value
                         )
             raise HTTPBadRequest(hint_text)
+        if self.bbox_prefilter:
+            clause_construct = and_(self.column.op('&&')(self.input_geometry_(srid)), clause_construct)
         return clause_construct
 
+    def decide_bbox_operation(self, srid):
+        """
+        Constructs the clause of the BBOX operator. It compares the bounding box of the column with the
+        passed extent by the && operator which is answered by the spatial index.
+
+        Args:
+            srid (int): The SRID/EPSG number to define the coordinate system of the geometry attribute.
+
+        Returns:
+            sqlalchemy.sql.elements.BinaryExpression: The clause element
+
+        Raises:
+            HTTPBadRequest
+        """
+        values = self.value if isinstance(self.value, list) else str(self.value).split(',')
+        try:
+            min_x, min_y, max_x, max_y = [float(value) for value in values]
+        except (TypeError, ValueError) as e:
+            hint_text = 'The value of the BBOX operator has to be "minx,miny,maxx,maxy". ' \
+                        'It was: {value}'.format(value=self.value)
+            log.error(e)
+            log.error(hint_text)
+            raise HTTPBadRequest(hint_text)
+        return self.column.op('&&')(func.ST_MakeEnvelope(min_x, min_y, max_x, max_y, srid))
+
+    def decide_dwithin_operation(self, srid):
+        """
+        Constructs the clause of the DWITHIN operator. It matches all geometries which are within the
+        distance (in units of the coordinate system) of the passed geometry. ST_DWithin uses the spatial
+        index itself, so it is never combined with the bounding box prefilter.
+
+        Args:
+            srid (int): The SRID/EPSG number to define the coordinate system of the geometry attribute.
+
+        Returns:
+            sqlalchemy.sql.functions.Function: The clause element
+
+        Raises:
+            HTTPBadRequest
+        """
+        try:
+            distance = float(self.distance)
+        except (TypeError, ValueError) as e:
+            hint_text = 'The DWITHIN operator needs a numeric distance. It was: {distance}'.format(
+                distance=self.distance
+            )
+            log.error(e)
+            log.error(hint_text)
+            raise HTTPBadRequest(hint_text)
+        return func.ST_DWithin(self.column, WKTElement(self.value, srid=srid), distance)
+
     def decide_geometric_operation(self, srid):
         """
         Decides the simple cases of geometric filter operations.
@@ -196,6 +308,23 @@ class Clause(object):
             )
         return clause
 
+    def input_geometry_(self, srid):
+        """
+        Delivers the passed geometry as scalar subquery of a common table expression. The WKT is passed as a
+        single bound parameter and parsed only once per statement by the database, even if the geometry is
+        used several times in the clause.
+
+        Args:
+            srid (int): The SRID/EPSG number to define the coordinate system of the geometry attribute.
+
+        Returns:
+            sqlalchemy.sql.selectable.ScalarSelect: The geometry.
+        """
+        if self.input_geometry is None:
+            geometry = select([func.ST_GeomFromText(literal(self.value, String()), srid).label('geom')]).cte()
+            self.input_geometry = select([geometry.c.geom]).as_scalar()
+        return self.input_geometry
+
     def extract_geometry_collection_db(self, db_path, srid):
         """
         Decides the geometry collections cases of geometric filter operations when the database contains multi
@@ -204,8 +333,8 @@ class Clause(object):
 
         Args:
             srid (int): The SRID/EPSG number to define the coordinate system of the geometry attribute.
-            db_path (str): The point separated string of schema_name.table_name.column_name from which we can
-                construct a correct SQL statement.
+            db_path (str): The point separated string of schema_name.table_name.column_name. It is not used
+                anymore since the clause is built on the column itself.
 
         Returns:
             sqlalchemy.sql.elements.BooleanClauseList: The clause element.
@@ -213,42 +342,24 @@ class Clause(object):
         Raises:
             HTTPBadRequest
         """
-        operator = self.decide_geometric_operator_(self.operator)
-        sql_text_point = '{0}(ST_CollectionExtract({1}, 1), ST_GeomFromText(\'{2}\', {3}))'.format(
-            operator,
-            db_path,
-            self.value,
-            srid
-        )
-        sql_text_line = '{0}(ST_CollectionExtract({1}, 2), ST_GeomFromText(\'{2}\', {3}))'.format(
-            operator,
-            db_path,
-            self.value,
-            srid
-        )
-        sql_text_polygon = '{0}(ST_CollectionExtract({1}, 3), ST_GeomFromText(\'{2}\', {3}))'.format(
-            operator,
-            db_path,
-            self.value,
-            srid
-        )
+        operation = getattr(func, self.decide_geometric_operator_(self.operator))
+        geometry = self.input_geometry_(srid)
         clause_blocks = [
-            text(sql_text_point),
-            text(sql_text_line),
-            text(sql_text_polygon)
+            operation(func.ST_CollectionExtract(self.column, collection_type), geometry)
+            for collection_type in [1, 2, 3]
         ]
         return or_(*clause_blocks)
 
     def extract_geometry_collection_input(self, db_path, srid):
         """
-        Decides the geometry collections cases of geometric filter operations when the database
-        contains multi geometries but the passed geometry does not.
+        Decides the geometry collections cases of geometric filter operations when the passed geometry
+        contains multi geometries but the database does not.
         The multi geometry will be extracted to it's sub parts for operation.
 
         Args:
             srid (int): The SRID/EPSG number to define the coordinate system of the geometry attribute.
-            db_path (str): The point separated string of *schema_name.table_name.column_name* from which we
-                can construct a correct SQL statement.
+            db_path (str): The point separated string of *schema_name.table_name.column_name*. It is not used
+                anymore since the clause is built on the column itself.
 
         Returns:
             sqlalchemy.sql.elements.BooleanClauseList: The clause element.
@@ -257,42 +368,24 @@ class Clause(object):
             HTTPBadRequest
         """
 
-        operator = self.decide_geometric_operator_(self.operator)
-        sql_text_point = '{0}({1}, ST_CollectionExtract(ST_GeomFromText(\'{2}\', {3}), 1))'.format(
-            operator,
-            db_path,
-            self.value,
-            srid
-        )
-        sql_text_line = '{0}({1}, ST_CollectionExtract(ST_GeomFromText(\'{2}\', {3}), 2))'.format(
-            operator,
-            db_path,
-            self.value,
-            srid
-        )
-        sql_text_polygon = '{0}({1}, ST_CollectionExtract(ST_GeomFromText(\'{2}\', {3}), 3))'.format(
-            operator,
-            db_path,
-            self.value,
-            srid
-        )
+        operation = getattr(func, self.decide_geometric_operator_(self.operator))
+        geometry = self.input_geometry_(srid)
         clause_blocks = [
-            text(sql_text_point),
-            text(sql_text_line),
-            text(sql_text_polygon)
+            operation(self.column, func.ST_CollectionExtract(geometry, collection_type))
+            for collection_type in [1, 2, 3]
         ]
         return or_(*clause_blocks)
 
     def extract_geometry_collection_input_and_db(self, db_path, srid):
         """
-        Decides the geometry collections cases of geometric filter operations when the database
-        contains multi geometries but the passed geometry does not.
-        The multi geometry will be extracted to it's sub parts for operation.
+        Decides the geometry collections cases of geometric filter operations when the database and the
+        passed geometry contain multi geometries.
+        The multi geometries will be extracted to their sub parts for operation.
 
         Args:
             srid (int): The SRID/EPSG number to define the coordinate system of the geometry attribute.
-            db_path (str): The point separated string of *schema_name.table_name.column_name* from which we
-                can construct a correct SQL statement.
+            db_path (str): The point separated string of *schema_name.table_name.column_name*. It is not used
+                anymore since the clause is built on the column itself.
 
         Returns:
             sqlalchemy.sql.elements.BooleanClauseList: The clause element.
@@ -301,24 +394,21 @@ class Clause(object):
             HTTPBadRequest
         """
 
-        operator = self.decide_geometric_operator_(self.operator)
-        sql_text_point = '{0}(ST_CollectionExtract({1}, 1), ST_CollectionExtract(' \
-                         'ST_GeomFromText(\'{2}\', {3}), 1))'.format(operator, db_path, self.value, srid)
-        sql_text_line = '{0}(ST_CollectionExtract({1}, 2), ST_CollectionExtract(' \
-                        'ST_GeomFromText(\'{2}\', {3}), 2))'.format(operator, db_path, self.value, srid)
-        sql_text_polygon = '{0}(ST_CollectionExtract({1}, 3), ST_CollectionExtract(' \
-                           'ST_GeomFromText(\'{2}\', {3}), 3))'.format(operator, db_path, self.value, srid)
+        operation = getattr(func, self.decide_geometric_operator_(self.operator))
+        geometry = self.input_geometry_(srid)
         clause_blocks = [
-            text(sql_text_point),
-            text(sql_text_line),
-            text(sql_text_polygon)
+            operation(
+                func.ST_CollectionExtract(self.column, collection_type),
+                func.ST_CollectionExtract(geometry, collection_type)
+            )
+            for collection_type in [1, 2, 3]
         ]
         return or_(*clause_blocks)
 
 
 class FilterBlock(object):
 
-    def __init__(self, model_description, definition=None):
+    def __init__(self, model_description, definition=None, bbox_prefilter=False):
         """
         The class which represents the filter block.
 
@@ -345,6 +435,7 @@ class FilterBlock(object):
             definition = {}
 
         self.model_description = model_description
+        self.bbox_prefilter = bbox_prefilter
 
         self.mode = 'AND'
 
@@ -370,9 +461,13 @@ class FilterBlock(object):
             clause_definition (dict): The values which are assigned to the object.
         """
         if clause_definition.get('mode'):
-            self.clauses.append(FilterBlock(self.model_description, clause_definition).clause)
+            self.clauses.append(
+                FilterBlock(self.model_description, clause_definition, self.bbox_prefilter).clause
+            )
         else:
-            self.clauses.append(Clause(clause_definition, self.model_description).clause_construct)
+            self.clauses.append(
+                Clause(clause_definition, self.model_description, self.bbox_prefilter).clause_construct
+            )
 
     def decide_mode(self):
         """
@@ -403,7 +498,7 @@ class FilterBlock(object):
 
 class Filter(object):
 
-    def __init__(self, model_description, definition=None):
+    def __init__(self, model_description, definition=None, clause_cache=None, bbox_prefilter=False):
         """
         The class which represents the filter.
 
@@ -424,12 +519,35 @@ class Filter(object):
                 This enables complex queries.
             model_description (pyramid_georest.lib.description.ModelDescription): The description of the model
                 which is being filtered.
+            clause_cache (pyramid_georest.lib.cache.LRUCache or None): A cache for the clauses of filter
+                definitions with the same structure (see :py:meth:`normalize_definition_`). If it is passed,
+                the clause is only constructed once per structure and the values of the definition are bound
+                as parameters to it. The filter blocks are not constructed at all (definition is None) when
+                the clause was found in the cache.
+            bbox_prefilter (bool): Whether geometric clauses are combined with a bounding box comparison
+                (see :py:class:`Clause`).
         """
 
         if definition is None:
             definition = {}
 
-        self.definition = FilterBlock(model_description, definition)
+        self.key = simplejson.dumps(definition, sort_keys=True)
+        self.definition = None
+        if clause_cache is None:
+            self.definition = FilterBlock(model_description, definition, bbox_prefilter)
+            self.clause = self.definition.clause
+        else:
+            values = {}
+            shape, bound_definition = self.normalize_definition_(model_description, definition, values)
+            shape_key = simplejson.dumps(shape, sort_keys=True)
+            clause = clause_cache.get(shape_key)
+            if clause is None:
+                self.definition = FilterBlock(model_description, bound_definition, bbox_prefilter)
+                clause = self.definition.clause
+                clause_cache.put(shape_key, clause)
+            if clause is not None and len(values) > 0:
+                clause = clause.params(values)
+            self.clause = clause
 
     def __str__(self):
         """
@@ -438,9 +556,60 @@ class Filter(object):
             str: The string representation of the object
         """
 
-        filter_text = str(self.definition.clause)
+        filter_text = str(self.clause)
         return "Filter: {filter_text}".format(filter_text=filter_text)
 
+    @classmethod
+    def normalize_definition_(cls, model_description, definition, values):
+        """
+        Splits a filter definition into its structure and its values. The structure contains the modes,
+        column names and operators (and the types of the values). The values are replaced by bind parameters
+        in the returned definition and collected by the name of their parameter. Values which change the
+        construction of the clause (geometries, NULL comparisons) stay part of the structure.
+
+        Args:
+            model_description (pyramid_georest.lib.description.ModelDescription): The description of the model
+                which is being filtered.
+            definition (dict): The definition of a filter block or of a clause.
+            values (dict): The values of the bind parameters which were found so far.
+
+        Returns:
+            tuple: The structure (list) and the definition with bind parameters (dict).
+        """
+
+        if 'clauses' in definition or definition.get('mode'):
+            shapes = []
+            clauses = []
+            for clause_definition in definition.get('clauses') or []:
+                shape, bound_definition = cls.normalize_definition_(
+                    model_description, clause_definition, values
+                )
+                shapes.append(shape)
+                clauses.append(bound_definition)
+            return [definition.get('mode'), shapes], dict(definition, clauses=clauses)
+        column_name = definition.get('column_name')
+        operator = definition.get('operator')
+        value = definition.get('value')
+        column_description = model_description.column_descriptions.get(column_name)
+        if column_description is None or column_description.get('is_geometry_column') or value is None or \
+                operator in ['NULL', 'NOT_NULL']:
+            return definition, definition
+        if operator == 'IN':
+            # like in Clause.decide_operator lists are used as they are and strings are comma separated
+            items = value if isinstance(value, list) else str(value).split(',')
+            # the items of IN do not adopt the type of the column, it is set like in_ does for plain values
+            column_type = model_description.column_classes[column_name].type
+            parameters = []
+            for item in items:
+                name = 'pyramid_georest_filter_{0}'.format(len(values))
+                values[name] = item
+                parameters.append(bindparam(name, type_=column_type))
+            return [column_name, operator, len(items)], dict(definition, value=parameters)
+        # the parameter adopts the type of the compared expression, so its bind processing is applied
+        name = 'pyramid_georest_filter_{0}'.format(len(values))
+        values[name] = value
+        return [column_name, operator], dict(definition, value=bindparam(name))
+
     def filter(self, query):
         """
         The actual filter execution against the database via the constructed clause from the
@@ -452,15 +621,19 @@ class Filter(object):
             sqlalchemy.orm.query.Query: The query with the applied filter
         """
 
-        # print self.definition.clause
-        if self.definition.clause is not None:
-            query = query.filter(self.definition.clause)
+        if self.clause is not None:
+            query = query.filter(self.clause)
         return query
 
 
 class Service(object):
 
-    def __init__(self, model, renderer_proxy=None, adapter_proxy=None):
+    def __init__(self, model, renderer_proxy=None, adapter_proxy=None, stream=False, stream_chunk_size=1000,
+                 geojson_in_database=False, geojson_precision=9, render_in_database=False,
+                 count_mode=COUNT_MODE_EXACT, count_cache_ttl=0, count_cache_size=128, filter_cache_size=0,
+                 bbox_prefilter=False, cluster_grid_cells=64, response_cache=None, conditional_requests=False,
+                 last_modified_column=None, bulk_batch_size=1000, max_affected_rows=None, expand=None,
+                 expand_strategy=EXPAND_STRATEGY_SELECTIN):
         """
         A object which represents an restful service. It offers all the necessary methods and is able to
         consume a renderer proxy. This way we assure a plug able system to use custom renderers.
@@ -473,11 +646,63 @@ class Service(object):
             renderer_proxy (RenderProxy or None): A renderer proxy may be passed to achieve custom rendering.
             adapter_proxy (AdapterProxy or None): An adapter which provides special client side library
                 handling. It is a AdapterProxy per default.
+            stream (bool): Whether the read method fetches the records in chunks and the renderer writes them
+                to the response while they arrive. This keeps the memory usage flat for big results.
+            stream_chunk_size (int): The number of records which are fetched from the database at once when
+                stream is enabled.
+            geojson_in_database (bool): Whether the geometry of the geojson read output is encoded by the
+                database with ST_AsGeoJSON instead of being converted in python. The geometry columns are
+                not loaded at all then. This is only supported by PostGIS. GeoJSON supports only one
+                geometry per feature, so the first geometry column of the model is used.
+            geojson_precision (int): The maximum number of decimal digits of coordinates which are written
+                by the database if geojson_in_database or render_in_database is enabled.
+            render_in_database (bool): Whether the json and geojson read output is completely built by the
+                database in one statement (json_agg/json_build_object) and passed to the response as it is.
+                The records are not loaded into the ORM then. This is only supported by PostgreSQL/PostGIS.
+            count_mode (str): How the count method counts the records if the request does not ask for a
+                mode. This is whether 'exact' or 'estimated'. Estimated counts are taken from the planner
+                statistics of PostgreSQL (reltuples without filter, the row estimate of EXPLAIN with filter).
+                Other databases always count exactly.
+            count_cache_ttl (int): The number of seconds an exact count is cached per filter. 0 disables the
+                cache.
+            count_cache_size (int): The number of filters whose exact count is cached. The count of the
+                filter which was not used for the longest time is dropped first.
+            filter_cache_size (int): The number of filter structures whose clauses are cached (see
+                :py:class:`Filter`). 0 (default) disables the cache.
+            bbox_prefilter (bool): Whether geometric filter clauses are combined with a bounding box
+                comparison (&&), so the spatial index is used for them in any case. This is only supported
+                by PostGIS.
+            cluster_grid_cells (int): The positive number of grid cells along the width of the passed extent
+                which is used by the cluster method if no resolution is requested.
+            response_cache (pyramid_georest.lib.cache.LRUCache or None): A cache for the rendered
+                responses of read and show requests. Every object with the methods get, put and clear can be
+                used (e.g. pyramid_georest.lib.cache.FileCache to share it between processes). It is cleared
+                by every create, update and delete request of the service. Streaming services are never
+                cached.
+            conditional_requests (bool): Whether read and show responses get a strong ETag computed from
+                their body, so requests with a matching If-None-Match header are answered with 304. Streamed
+                responses get no ETag.
+            last_modified_column (str or None): The name of a date or timestamp column which holds the time
+                of the last modification of a record. If it is set, read and show responses get a
+                Last-Modified header and requests whose If-Modified-Since header is not older are answered
+                with 304 before the records are read (read) or serialized (show).
+            bulk_batch_size (int): The number of records which are inserted with one statement by a bulk
+                create request.
+            max_affected_rows (int or None): The maximum number of records which may be changed by one
+                bulk update or bulk delete request. Requests which would change more records are rejected
+                and rolled back. There is no limit if it is None.
+            expand (list of str or None): The names of the relationships which are loaded eagerly by read
+                and show requests which do not pass the parameter expand themselves. Relationships are
+                loaded lazily (one query per record and relationship when they are accessed) if it is None.
+            expand_strategy (str): How expanded relationships are loaded. This is whether selectin (one
+                additional query per relationship) or joined (a join in the query of the records). Streamed
+                reads and reads with count always use selectin.
         """
 
         self.orm_model = model
         self.model_description = ModelDescription(self.orm_model)
         self.primary_key_names = self.model_description.primary_key_column_names
+        self.mapper_primary_key = class_mapper(self.orm_model).primary_key
         self.name = self.name_from_definition(
             self.model_description.schema_name,
             self.model_description.table_name
@@ -492,6 +717,63 @@ class Service(object):
         else:
             self.adapter_proxy = adapter_proxy
 
+        self.stream = stream
+        self.stream_chunk_size = stream_chunk_size
+        self.geojson_in_database = geojson_in_database
+        self.geojson_precision = geojson_precision
+        self.render_in_database = render_in_database
+        if count_mode not in COUNT_MODES:
+            raise ValueError('The count mode "{mode}" is not implemented.'.format(mode=count_mode))
+        self.count_mode = count_mode
+        self.count_cache_ttl = count_cache_ttl
+        self.count_cache = LRUCache(count_cache_size, ttl=count_cache_ttl) if count_cache_ttl > 0 else None
+        self.filter_cache = LRUCache(filter_cache_size) if filter_cache_size > 0 else None
+        self.bbox_prefilter = bbox_prefilter
+        if cluster_grid_cells <= 0:
+            raise ValueError('The number of cluster grid cells has to be positive.')
+        self.cluster_grid_cells = cluster_grid_cells
+        self.response_cache = response_cache
+        self.conditional_requests = conditional_requests
+        if last_modified_column is not None and \
+                not self.model_description.is_valid_column(last_modified_column):
+            raise ValueError('The last modified column "{column}" is not a column of the model.'.format(
+                column=last_modified_column
+            ))
+        if last_modified_column is not None and \
+                not self.is_date_column_(self.model_description.column_classes[last_modified_column]):
+            raise ValueError('The last modified column "{column}" is no date or timestamp column.'.format(
+                column=last_modified_column
+            ))
+        self.last_modified_column = last_modified_column
+        self.bulk_batch_size = bulk_batch_size
+        self.max_affected_rows = max_affected_rows
+        if expand_strategy not in EXPAND_STRATEGIES:
+            raise ValueError('The expand strategy "{strategy}" is not implemented.'.format(
+                strategy=expand_strategy
+            ))
+        for relationship_name in expand or []:
+            if relationship_name not in self.model_description.relationship_descriptions:
+                raise ValueError('The relationship "{name}" is not a relationship of the model.'.format(
+                    name=relationship_name
+                ))
+        self.expand = expand
+        self.expand_strategy = expand_strategy
+
+    @staticmethod
+    def is_date_column_(column):
+        """
+        Little helper method to check whether the values of a column are dates or timestamps.
+
+        Args:
+            column (sqlalchemy.schema.Column): The column.
+        Returns:
+            bool: Whether the python type of the column is datetime.date or datetime.datetime.
+        """
+        try:
+            return issubclass(column.type.python_type, datetime.date)
+        except NotImplementedError:
+            return False
+
     @staticmethod
     def name_from_definition(schema_name, table_name):
         """
@@ -509,10 +791,22 @@ class Service(object):
             table_name
         )
 
-    def record_by_primary_keys_(self, session, primary_keys):
-        query = session.query(self.orm_model)
-        model_description = ModelDescription(self.orm_model)
-        model_primary_keys = model_description.primary_key_columns.items()
+    def identity_(self, primary_keys):
+        """
+        Converts the primary key values of a request (in the order of the primary key columns of the model
+        description) to the identity of a record (in the order of the mapper) with the python types of the
+        columns.
+
+        Args:
+            primary_keys (list): The primary key values.
+
+        Returns:
+            tuple: The identity.
+
+        Raises:
+            HTTPBadRequest
+        """
+        model_primary_keys = list(self.model_description.primary_key_columns.values())
         if len(primary_keys) != len(model_primary_keys):
             hint_text = "The number of passed primary keys mismatch the model given. Can't complete the " \
                         "request. Sorry..."
@@ -520,18 +814,98 @@ class Service(object):
             raise HTTPBadRequest(
                 detail=hint_text
             )
-        for index, requested_primary_key in enumerate(primary_keys):
-            query = query.filter(model_primary_keys[index][1] == requested_primary_key)
+        values = {}
+        for column, value in zip(model_primary_keys, primary_keys):
+            values[column] = self.primary_key_value_(column, value)
+        return tuple(values[column] for column in self.mapper_primary_key)
+
+    @staticmethod
+    def primary_key_value_(column, value):
+        """
+        Converts a primary key value of a request (e.g. a string from the url) to the python type of its
+        column, so the record can be found in the identity map of the session.
+
+        Args:
+            column (sqlalchemy.schema.Column): The primary key column.
+            value (object): The passed value.
+        Returns:
+            object: The converted value.
+
+        Raises:
+            HTTPBadRequest
+        """
         try:
-            result = query.one()
-            return result
-        except MultipleResultsFound as e:
-            hint_text = "Strange thing happened... Found more than one record for the primary key(s) " \
-                        "you passed."
-            log.error('{text}, Original error was: {error}'.format(text=hint_text, error=e))
-            raise HTTPBadRequest(
+            python_type = column.type.python_type
+        except NotImplementedError:
+            return value
+        try:
+            if issubclass(python_type, bool):
+                return value
+            elif issubclass(python_type, (int, float, decimal.Decimal)):
+                return python_type(value)
+        except (TypeError, ValueError, decimal.InvalidOperation) as e:
+            hint_text = 'The primary key "{value}" does not match the type of its column.'.format(value=value)
+            log.error(e)
+            log.error(hint_text)
+            raise HTTPBadRequest(hint_text)
+        return value
+
+    def record_by_primary_keys_(self, session, primary_keys, options=()):
+        """
+        Delivers the record with the passed primary keys. It is taken from the identity map of the session
+        if it was loaded before, otherwise it is loaded by its primary key.
+
+        Args:
+            session (sqlalchemy.orm.Session): The sqlalchemy session object
+            primary_keys (list of str): The primary keys which are used to filter the exact element.
+            options (tuple or list): The loader options of the query (see :py:meth:`expand_options_`).
+
+        Returns:
+            sqlalchemy.ext.declarative.DeclarativeMeta: The record.
+
+        Raises:
+            HTTPBadRequest
+            HTTPNotFound
+        """
+        result = session.query(self.orm_model).options(*options).get(self.identity_(primary_keys))
+        if result is None:
+            hint_text = 'There is no record with the primary key(s) {keys}.'.format(keys=primary_keys)
+            log.error(hint_text)
+            raise HTTPNotFound(
                 detail=hint_text
             )
+        return result
+
+    def records_by_primary_keys_(self, session, primary_keys_list, options=()):
+        """
+        Delivers the records with the passed primary keys in one query (IN on the primary key columns).
+
+        Args:
+            session (sqlalchemy.orm.Session): The sqlalchemy session object
+            primary_keys_list (list of list): The primary keys of every requested record.
+            options (tuple or list): The loader options of the query (see :py:meth:`expand_options_`).
+
+        Returns:
+            list of sqlalchemy.ext.declarative.DeclarativeMeta: The records in the requested order. Primary
+                keys without record are skipped.
+
+        Raises:
+            HTTPBadRequest
+        """
+        identities = [self.identity_(primary_keys) for primary_keys in primary_keys_list]
+        if len(identities) == 0:
+            return []
+        columns = list(self.mapper_primary_key)
+        query = session.query(self.orm_model).options(*options)
+        if len(columns) == 1:
+            query = query.filter(columns[0].in_([identity[0] for identity in identities]))
+        else:
+            query = query.filter(tuple_(*columns).in_(identities))
+        mapper = class_mapper(self.orm_model)
+        records = dict(
+            (tuple(mapper.primary_key_from_instance(record)), record) for record in query.all()
+        )
+        return [records[identity] for identity in identities if identity in records]
 
     def handle_json_(self, orm_object, feature):
         """
@@ -581,8 +955,25 @@ class Service(object):
         else:
             return value
 
+    def database_geojson_query_(self, query):
+        """
+        Extends the query by the GeoJSON representation of the models first geometry column which is created
+        by the database. The geometry columns themselves are not loaded anymore.
+
+        Args:
+            query (sqlalchemy.orm.query.Query): The query which should be extended.
+        Returns:
+            sqlalchemy.orm.query.Query: The query which delivers rows of the record and the GeoJSON text.
+        """
+        geometry_column_names = self.model_description.geometry_column_names
+        geometry_column = self.model_description.geometry_columns[geometry_column_names[0]]
+        query = query.options(*[defer(column_name) for column_name in geometry_column_names])
+        return query.add_columns(
+            func.ST_AsGeoJSON(geometry_column, self.geojson_precision).label(DATABASE_GEOJSON_LABEL)
+        )
+
     def read(self, session, request, rest_filter=None, offset=None, limit=None, order_by=None,
-             direction=None):
+             direction=None, fields=None, cursor=None, nearest=None, expand=None):
         """
         The method which is used by the api to read a bunch of records from the database.
 
@@ -600,29 +991,39 @@ class Service(object):
                 direction is present too.
             direction (str or None): The direction which is used for sorting. It is only used if order_by
                 is present too.
+            fields (list of str or None): The names of the columns which are loaded. All columns are loaded
+                if it is None.
+            cursor (str or None): The token of the page which is read with keyset pagination (see
+                :py:meth:`next_cursor`). An empty string reads the first page. The offset is ignored then
+                and the limit is mandatory. Keyset pagination is not used if it is None.
+            nearest (str or None): A WKT geometry. If it is passed, the records are ordered by the distance
+                of their first geometry column to it (KNN operator <->) instead of order_by. The offset and
+                the limit are mandatory then.
+            expand (list of str or None): The names of the relationships which are loaded eagerly. The
+                default of the service is used if it is None.
 
         Returns:
-             list of sqlalchemy.ext.declarative.DeclarativeMeta: A list of database records found for the
-                request.
-        """
-        query = session.query(self.orm_model)
-        if rest_filter is not None:
-            query = rest_filter.filter(query)
-        if isinstance(order_by, str) and isinstance(direction, str):
-            column = self.model_description.column_classes.get(order_by)
-            if direction in DIRECTION_ASC:
-                query = query.order_by(asc(column))
-            elif direction in DIRECTION_DESC:
-                query = query.order_by(desc(column))
-        if isinstance(offset, int) and isinstance(limit, int):
-            query = query.offset(offset)
-            query = query.limit(limit)
+             list of sqlalchemy.ext.declarative.DeclarativeMeta or sqlalchemy.orm.query.Query: A list of
+                database records found for the request. If the service streams, the query is returned
+                instead. It fetches the records in chunks of stream_chunk_size when it is iterated. Pages of
+                keyset pagination are always returned as list.
+        """
+        query = self.read_query_(session, request, rest_filter, offset, limit, order_by, direction, fields,
+                                 cursor, nearest)
+        if self.stream and cursor is None:
+            # joined eager loading of collections can not be combined with yield_per
+            query = query.options(*self.expand_options_(expand, EXPAND_STRATEGY_SELECTIN))
+            return query.yield_per(self.stream_chunk_size)
+        query = query.options(*self.expand_options_(expand))
         results = query.all()
         return results
 
-    def count(self, session, request, rest_filter=None):
+    def read_with_count(self, session, request, rest_filter=None, offset=None, limit=None, order_by=None,
+                        direction=None, fields=None, nearest=None, expand=None):
         """
-        The method which is used by the api to count the number of records in the database.
+        The method which is used by the api to read records from the database together with the number of
+        all records matching the filter. The number is computed in the same statement by a window function
+        (count(*) over ()), so the filter is evaluated only once. Streaming is not used here.
 
         Args:
             session (sqlalchemy.orm.Session): The session which is uesed to emit the query.
@@ -630,375 +1031,1851 @@ class Service(object):
                 from the client
             rest_filter (pyramid_georest.lib.rest.Filter or None): The Filter which might be applied to the
                 query in addition.
+            offset (int or None): The offset which is used for paging reasons.
+            limit (int or None): The limit which is used for paging reason.
+            order_by (str or None): The column name which the sort is assigned to.
+            direction (str or None): The direction which is used for sorting.
+            fields (list of str or None): The names of the columns which are loaded.
+            nearest (str or None): A WKT geometry the records are ordered by distance to.
+            expand (list of str or None): The names of the relationships which are loaded eagerly.
 
         Returns:
-             int: The count of records found in the database.
-        """
-        query = session.query(self.orm_model)
-        if rest_filter is not None:
-            query = rest_filter.filter(query)
-        count = query.count()
-        return count
+             tuple: The list of database records found for the request and the number of all records
+                matching the filter.
+        """
+        query = self.read_query_(session, request, rest_filter, offset, limit, order_by, direction, fields,
+                                 nearest=nearest)
+        # joined rows would be counted by the window function
+        query = query.options(*self.expand_options_(expand, EXPAND_STRATEGY_SELECTIN))
+        rows = query.add_columns(func.count().over().label(TOTAL_COUNT_LABEL)).all()
+        if len(rows) == 0:
+            # an offset behind the last record delivers no row which could carry the count
+            if offset:
+                return [], self.count(session, request, rest_filter, mode=COUNT_MODE_EXACT)
+            return [], 0
+        # the rows keep their labels without the count, the renderers access the GeoJSON text by its label
+        results = [row[0] if len(row) == 2 else KeyedTuple(row[:-1], row.keys()[:-1]) for row in rows]
+        return results, rows[0][-1]
+
+    def read_query_(self, session, request, rest_filter, offset, limit, order_by, direction, fields,
+                    cursor=None, nearest=None):
+        """
+        Builds the query which is used to read the records. See :py:meth:`read` for the arguments.
 
-    def show(self, session, request, primary_keys):
+        Returns:
+             sqlalchemy.orm.query.Query: The query.
         """
-        The method which is used by the api to read exact one record from the database.
+        query = session.query(self.orm_model)
+        geometry_column_names = self.model_description.geometry_column_names
+        if fields is not None:
+            if cursor is not None and order_by is not None and order_by not in fields:
+                # the order column is needed to build the next cursor
+                query = query.options(load_only(*(fields + [order_by])))
+            else:
+                query = query.options(load_only(*fields))
+        if self.geojson_in_database and request.matchdict.get('format') == 'geojson' and \
+                len(geometry_column_names) > 0 and (fields is None or geometry_column_names[0] in fields):
+            query = self.database_geojson_query_(query)
+        if cursor is not None:
+            query = self.restrict_query_(query, rest_filter, None, None, None, None)
+            return self.keyset_query_(query, cursor, limit, order_by, direction)
+        if nearest is not None:
+            query = self.restrict_query_(query, rest_filter, None, None, None, None)
+            return query.order_by(self.nearest_order_(nearest)).offset(offset).limit(limit)
+        return self.restrict_query_(query, rest_filter, offset, limit, order_by, direction)
+
+    def expand_options_(self, expand, strategy=None):
+        """
+        Delivers the loader options which load the expanded relationships eagerly, so accessing them while
+        rendering does not emit one query per record.
 
         Args:
-            session (sqlalchemy.orm.Session): The sqlalchemy session object
-            request (pyramid.request.Request): The request which comes all the way through the application
-            from the client
-            primary_keys (list of str): The primary keys which are used to filter the exact element.
-
+            expand (list of str or None): The names of the relationships. The default of the service is used
+                if it is None.
+            strategy (str or None): The loading strategy. The expand_strategy of the service is used if it is
+                None.
         Returns:
-             list of sqlalchemy.ext.declarative.DeclarativeMeta: A list of database records found for the
-                request.
+            list of sqlalchemy.orm.strategy_options.Load: The loader options.
         """
-        result = self.record_by_primary_keys_(session, primary_keys)
-        return [result]
+        if expand is None:
+            expand = self.expand or []
+        loader = EXPAND_STRATEGIES[strategy or self.expand_strategy]
+        return [loader(getattr(self.orm_model, relationship_name)) for relationship_name in expand]
 
-    def create(self, session, request, feature, passed_format):
+    def nearest_order_(self, nearest):
         """
-        The method which is used by the api to create exact one record in the database.
+        Delivers the order of the nearest read mode. It is the KNN distance operator (<->) between the first
+        geometry column of the model and the passed geometry. Combined with a limit it is answered by the
+        spatial index. This is only supported by PostGIS.
 
         Args:
-            request (pyramid.request.Request): The request which comes all the way through the application
-            from the client
-            session (sqlalchemy.orm.Session): The sqlalchemy session object
-            feature (dict): The feature which should be created in database.
-            passed_format (str): The format which the feature is constructed of.
-
+            nearest (str): The WKT geometry the records are ordered by distance to.
         Returns:
-            list of sqlalchemy.ext.declarative.DeclarativeMeta: A list of database records found for the
-                request.
+            sqlalchemy.sql.elements.BinaryExpression: The order clause.
+
+        Raises:
+            HTTPBadRequest
         """
-        orm_object = self.orm_model()
-        if passed_format == 'json':
-            self.handle_json_(orm_object, feature)
-        elif passed_format == 'geojson':
-            self.handle_geojson_(orm_object, feature)
-        else:
-            hint_text = 'The Format "{format}" is not defined for this service. Sorry...'.format(
-                format=passed_format
+        geometry_column_names = self.model_description.geometry_column_names
+        if len(geometry_column_names) == 0:
+            hint_txt = 'The service {name} has no geometry column to read the nearest records.'.format(
+                name=self.name
             )
-            log.error(hint_text)
-            raise HTTPNotFound(
-                detail=hint_text
+            log.error(hint_txt)
+            raise HTTPBadRequest(hint_txt)
+        column_name = geometry_column_names[0]
+        column = self.model_description.column_classes.get(column_name)
+        srid = self.model_description.column_descriptions.get(column_name).get('srid')
+        try:
+            wkt.loads(nearest)
+        except WKTReadingError as e:
+            hint_txt = 'The parameter nearest has to be a WKT geometry. The passed value was {0}'.format(
+                nearest
             )
-        session.add(orm_object)
-        session.flush()
-        return [orm_object]
+            log.error(e)
+            log.error(hint_txt)
+            raise HTTPBadRequest(hint_txt)
+        return column.op('<->')(WKTElement(nearest, srid=srid))
 
-    def update(self, session, request, primary_keys, feature, passed_format):
+    def keyset_column_names_(self, order_by):
         """
-        The method which is used by the api to update exact one record in the database.
+        Delivers the names of the columns which define the order of keyset pagination. This is the order_by
+        column followed by the primary key columns which make the order unique.
 
         Args:
-            session (sqlalchemy.orm.Session): The sqlalchemy session object
-            request (pyramid.request.Request): The request which comes all the way through the application
-            from the client
-            primary_keys (list of str): The primary keys which are used to filter the exact element.
-            feature (dict): The feature which should be updated in database.
-            passed_format (str): The format which the feature is constructed of.
-
+            order_by (str or None): The column name which the sort is assigned to.
         Returns:
-            list of sqlalchemy.ext.declarative.DeclarativeMeta: A list of database records found for the
-                request.
+            list of str: The column names.
         """
-        orm_object = self.record_by_primary_keys_(session, primary_keys)
-        if passed_format == 'json':
-            self.handle_json_(orm_object, feature)
-        elif passed_format == 'geojson':
-            self.handle_geojson_(orm_object, feature)
-        else:
-            hint_text = 'The Format "{format}" is not defined for this service. Sorry...'.format(
-                format=passed_format
-            )
-            log.error(hint_text)
-            raise HTTPNotFound(
-                detail=hint_text
-            )
-        session.add(orm_object)
-        session.flush()
-        return [orm_object]
+        if order_by is None or order_by in self.primary_key_names:
+            return list(self.primary_key_names)
+        return [order_by] + list(self.primary_key_names)
 
-    def delete(self, session, request, primary_keys):
+    def keyset_query_(self, query, cursor, limit, order_by, direction):
         """
-        The method which is used by the api to delete exact one record in the database.
+        Restricts the query to the page which follows the record the cursor was created for. The records are
+        ordered by the keyset columns (see :py:meth:`keyset_column_names_`), so every page is found by an
+        index lookup instead of skipping all records before it. The database has to support row value
+        comparison (e.g. PostgreSQL, MySQL, SQLite).
 
         Args:
-            session (sqlalchemy.orm.Session): The sqlalchemy session object
-            request (pyramid.request.Request): The request which comes all the way through the application
-            from the client
-            primary_keys (list of str): The primary keys which are used to filter the exact element.
-
+            query (sqlalchemy.orm.query.Query): The query which should be restricted.
+            cursor (str): The token of the page. An empty string reads the first page.
+            limit (int): The number of records of the page.
+            order_by (str or None): The column name which the sort is assigned to.
+            direction (str or None): The direction which is used for sorting. Ascending if it is None.
         Returns:
-             list of sqlalchemy.ext.declarative.DeclarativeMeta: A list of database records found for the
-                request.
-        """
+            sqlalchemy.orm.query.Query: The restricted query.
 
-        result = self.record_by_primary_keys_(session, primary_keys)
-        session.delete(result)
-        session.flush()
-        return [result]
+        Raises:
+            HTTPBadRequest
+        """
+        column_classes = self.model_description.column_classes
+        columns = [column_classes.get(column_name) for column_name in self.keyset_column_names_(order_by)]
+        descending = direction in DIRECTION_DESC
+        nullable = order_by is not None and order_by not in self.primary_key_names and columns[0].nullable
+        if cursor:
+            cursor_values = self.cursor_values_(cursor, order_by, direction)
+            values = [
+                literal(self.keyset_value_(column, value), type_=column.type)
+                for column, value in zip(columns, cursor_values)
+            ]
+            if nullable:
+                query = query.filter(self.nullable_keyset_clause_(columns, values, cursor_values[0] is None,
+                                                                  descending))
+            elif descending:
+                query = query.filter(tuple_(*columns) < tuple_(*values))
+            else:
+                query = query.filter(tuple_(*columns) > tuple_(*values))
+        order = desc if descending else asc
+        if nullable:
+            # NULL is sorted after all values (before them descending) in every database
+            query = query.order_by(order(columns[0].is_(None)))
+        query = query.order_by(*[order(column) for column in columns])
+        return query.limit(limit)
 
-    def model(self, request):
+    @staticmethod
+    def nullable_keyset_clause_(columns, values, after_null, descending):
         """
-        The method which is used by the api to deliver a machine readable and serializable description of
-        the underlying database table/model.
+        Builds the restriction of keyset pagination for an order_by column which can contain NULL. A row
+        value comparison with NULL is never true, so the records with NULL are compared by their primary
+        keys only. They follow all other records (ascending) or precede them (descending).
 
         Args:
-            request (pyramid.request.Request): The request which comes all the way through the application
-                    from the client
+            columns (list of sqlalchemy.schema.Column): The keyset columns, the order_by column first.
+            values (list): The keyset values of the last record of the previous page.
+            after_null (bool): Whether the order_by value of the last record was NULL.
+            descending (bool): Whether the records are sorted descending.
         Returns:
-            pyramid_georest.lib.description.ModelDescription: The model description of this service.
+            sqlalchemy.sql.elements.ClauseElement: The restriction.
         """
+        order_column = columns[0]
+        if descending:
+            def follows(keys, key_values):
+                return tuple_(*keys) < tuple_(*key_values)
+        else:
+            def follows(keys, key_values):
+                return tuple_(*keys) > tuple_(*key_values)
+        if after_null:
+            clause = and_(order_column.is_(None), follows(columns[1:], values[1:]))
+            if descending:
+                clause = or_(clause, order_column.isnot(None))
+        else:
+            clause = and_(order_column.isnot(None), follows(columns, values))
+            if not descending:
+                clause = or_(clause, order_column.is_(None))
+        return clause
 
-        return self.model_description
-
-    def adapter(self, request):
+    def next_cursor(self, results, limit, order_by=None, direction=None):
         """
-        The method which is used by the api to deliver a client side usable adapter to handle the REST API.
+        Creates the opaque token which is used to read the page following the passed one with keyset
+        pagination.
 
         Args:
-            request (pyramid.request.Request): The request which comes all the way through the application
+            results (list): The records of the current page.
+            limit (int): The limit which was used to read the page.
+            order_by (str or None): The column name which the sort is assigned to.
+            direction (str or None): The direction which is used for sorting.
+        Returns:
+            str or None: The token of the next page or None if this was the last page.
+        """
+        if len(results) == 0 or len(results) < limit:
+            return None
+        record = results[-1]
+        if isinstance(record, tuple):
+            record = record[0]
+        payload = {
+            'order_by': order_by,
+            'direction': 'desc' if direction in DIRECTION_DESC else 'asc',
+            'values': [getattr(record, column_name) for column_name in self.keyset_column_names_(order_by)]
+        }
+        serialized = simplejson.dumps(payload, default=self.keyset_serializable_)
+        return base64.urlsafe_b64encode(serialized.encode('utf-8')).decode('ascii')
+
+    def cursor_values_(self, cursor, order_by, direction):
+        """
+        Extracts the values of the keyset columns from the cursor token.
+
+        Args:
+            cursor (str): The token which was created by :py:meth:`next_cursor`.
+            order_by (str or None): The column name which the sort is assigned to.
+            direction (str or None): The direction which is used for sorting.
+        Returns:
+            list: The values of the keyset columns.
+
+        Raises:
+            HTTPBadRequest
+        """
+        try:
+            payload = simplejson.loads(base64.urlsafe_b64decode(cursor.encode('ascii')), use_decimal=True)
+        except (ValueError, TypeError, binascii.Error) as e:
+            log.error(e)
+            raise HTTPBadRequest('The passed cursor is not valid.')
+        if not isinstance(payload, dict) or \
+                payload.get('order_by') != order_by or \
+                payload.get('direction') != ('desc' if direction in DIRECTION_DESC else 'asc') or \
+                len(payload.get('values') or []) != len(self.keyset_column_names_(order_by)):
+            raise HTTPBadRequest('The passed cursor does not match the requested order.')
+        return payload.get('values')
+
+    @staticmethod
+    def keyset_serializable_(value):
+        # fixed formats instead of isoformat, so the values can be parsed back by strptime
+        if isinstance(value, datetime.datetime):
+            return value.strftime(CURSOR_DATETIME_FORMAT + ('' if value.utcoffset() is None else '%z'))
+        elif isinstance(value, datetime.date):
+            return value.strftime(CURSOR_DATE_FORMAT)
+        elif isinstance(value, datetime.time):
+            return value.strftime(CURSOR_TIME_FORMAT + ('' if value.utcoffset() is None else '%z'))
+        raise TypeError('Type is not JSON serializable: {0}'.format(type(value).__name__))
+
+    @staticmethod
+    def keyset_value_(column, value):
+        """
+        Converts a value of the cursor token back to the python type of its column.
+
+        Args:
+            column (sqlalchemy.schema.Column): The keyset column.
+            value (object): The value from the token.
+        Returns:
+            object: The converted value.
+
+        Raises:
+            HTTPBadRequest
+        """
+        if value is None:
+            return value
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            return value
+        try:
+            if issubclass(python_type, datetime.datetime):
+                return Service.cursor_strptime_(value, CURSOR_DATETIME_FORMAT)
+            elif issubclass(python_type, datetime.date):
+                return datetime.datetime.strptime(value, CURSOR_DATE_FORMAT).date()
+            elif issubclass(python_type, datetime.time):
+                return Service.cursor_strptime_(value, CURSOR_TIME_FORMAT).timetz()
+            elif issubclass(python_type, decimal.Decimal):
+                return decimal.Decimal(value)
+        except (ValueError, TypeError) as e:
+            log.error(e)
+            raise HTTPBadRequest('The passed cursor is not valid.')
+        return value
+
+    @staticmethod
+    def cursor_strptime_(value, date_format):
+        """
+        Parses a date time value of the cursor token which was serialized with the passed format and
+        an optional utc offset.
+
+        Args:
+            value (str): The value from the token.
+            date_format (str): The format the value was serialized with.
+        Returns:
+            datetime.datetime: The parsed value.
+
+        Raises:
+            ValueError
+        """
+        try:
+            return datetime.datetime.strptime(value, date_format)
+        except ValueError:
+            return datetime.datetime.strptime(value, date_format + '%z')
+
+    def read_as_text(self, session, request, passed_format, rest_filter=None, offset=None, limit=None,
+                     order_by=None, direction=None, fields=None):
+        """
+        The method which is used by the api to read a bunch of records from the database if the service
+        renders in the database. The records are not loaded into the ORM at all. Instead the database
+        delivers the finished document as text.
+
+        Args:
+            session (sqlalchemy.orm.Session): The session which is uesed to emit the query.
+            request (pyramid.request.Request): The request which comes all the way through the application
                 from the client
+            passed_format (str): The requested format. This is whether json or geojson.
+            rest_filter (pyramid_georest.lib.rest.Filter or None): The Filter which might be applied to the
+                query in addition.
+            offset (int or None): The offset which is used for paging reasons. It is only applied if limit is
+                present too.
+            limit (int or None): The limit which is used for paging reason. It is only applied of offest is
+                present too.
+            order_by (str or None): The column name which the sort is assigned to. It is only used if
+                direction is present too.
+            direction (str or None): The direction which is used for sorting. It is only used if order_by
+                is present too.
+            fields (list of str or None): The names of the columns which are loaded. All columns are loaded
+                if it is None.
+
         Returns:
-            pyramid_georest.lib.description.ModelDescription: The model description of this service.
+             str: The serialized records.
         """
+        query = self.database_rendered_query_(session, passed_format, rest_filter, offset, limit, order_by,
+                                              direction, fields)
+        return query.scalar()
 
-        return self.model_description
+    def restrict_query_(self, query, rest_filter, offset, limit, order_by, direction):
+        """
+        Applies the filter, the sorting and the paging of a read request to the query.
+
+        Args:
+            query (sqlalchemy.orm.query.Query): The query which should be restricted.
+            rest_filter (pyramid_georest.lib.rest.Filter or None): The Filter which might be applied.
+            offset (int or None): The offset which is only applied if limit is present too.
+            limit (int or None): The limit which is only applied if offset is present too.
+            order_by (str or None): The column name which is only used if direction is present too.
+            direction (str or None): The direction which is only used if order_by is present too.
+        Returns:
+            sqlalchemy.orm.query.Query: The restricted query.
+        """
+        if rest_filter is not None:
+            query = rest_filter.filter(query)
+        if isinstance(order_by, str) and isinstance(direction, str):
+            column = self.model_description.column_classes.get(order_by)
+            if direction in DIRECTION_ASC:
+                query = query.order_by(asc(column))
+            elif direction in DIRECTION_DESC:
+                query = query.order_by(desc(column))
+        if isinstance(offset, int) and isinstance(limit, int):
+            query = query.offset(offset)
+            query = query.limit(limit)
+        return query
 
+    def database_rendered_query_(self, session, passed_format, rest_filter, offset, limit, order_by,
+                                 direction, fields=None):
+        """
+        Constructs one statement which selects the restricted records and aggregates them to the finished
+        json array or GeoJSON FeatureCollection (json_agg, json_build_object). This is only supported by
+        PostgreSQL/PostGIS.
 
-class Api(object):
+        Args:
+            session (sqlalchemy.orm.Session): The session which is uesed to emit the query.
+            passed_format (str): The requested format. This is whether json or geojson.
+            rest_filter (pyramid_georest.lib.rest.Filter or None): The Filter which might be applied.
+            offset (int or None): The offset which is only applied if limit is present too.
+            limit (int or None): The limit which is only applied if offset is present too.
+            order_by (str or None): The column name which is only used if direction is present too.
+            direction (str or None): The direction which is only used if order_by is present too.
+            fields (list of str or None): The names of the columns which are delivered. All columns are
+                delivered if it is None.
+        Returns:
+            sqlalchemy.orm.query.Query: The query which delivers the document as one text value.
 
-    def __init__(self, url, config, name, read_method='GET', read_filter_method='POST', create_method='POST',
-                 update_method='PUT', delete_method='DELETE'):
+        Raises:
+            HTTPNotFound
         """
-        A Object which holds the connection to the database and arbitrary numbers of services. It works
-        like a proxy for the request. It decides which service will be finally called by reading
-        the requested url parts and calls the appropriate service method.
+        geometry_column_names = self.model_description.geometry_column_names
+        columns = []
+        for column_name, column in self.model_description.column_classes.items():
+            if fields is not None and column_name not in fields:
+                continue
+            if column_name not in geometry_column_names:
+                columns.append(column.label(column_name))
+            elif passed_format == 'json':
+                columns.append(func.ST_AsText(column).label(column_name))
+            elif passed_format == 'geojson' and column_name == geometry_column_names[0]:
+                columns.append(func.ST_AsGeoJSON(column, self.geojson_precision).label(column_name))
+        query = self.restrict_query_(
+            session.query(*columns),
+            rest_filter,
+            offset,
+            limit,
+            order_by,
+            direction
+        )
+        records = query.subquery('records')
+        record = literal_column(records.name)
+        if passed_format == 'json':
+            element = record
+        elif passed_format == 'geojson':
+            if len(geometry_column_names) > 0 and geometry_column_names[0] in records.c:
+                geometry = cast(records.c[geometry_column_names[0]], JSON)
+                properties = func.to_jsonb(record).op('-')(geometry_column_names[0])
+            else:
+                geometry = literal_column("'{}'::json")
+                properties = record
+            element = func.json_build_object(
+                'type', 'Feature',
+                'geometry', geometry,
+                'properties', properties
+            )
+        else:
+            hint_text = 'The Format "{format}" is not rendered by the database. Sorry...'.format(
+                format=passed_format
+            )
+            log.error(hint_text)
+            raise HTTPNotFound(
+                detail=hint_text
+            )
+        if isinstance(order_by, str) and isinstance(direction, str) and order_by in records.c:
+            if direction in DIRECTION_ASC:
+                element = aggregate_order_by(element, asc(records.c[order_by]))
+            elif direction in DIRECTION_DESC:
+                element = aggregate_order_by(element, desc(records.c[order_by]))
+        document = func.coalesce(func.json_agg(element), literal_column("'[]'::json"))
+        if passed_format == 'geojson':
+            document = func.json_build_object('type', 'FeatureCollection', 'features', document)
+        return session.query(cast(document, Text)).select_from(records)
 
-        In addition you can implement api wide behaviour like authorization be subclassing this class
-        and adding some pre or post processing to the particular methods.
+    def count(self, session, request, rest_filter=None, mode=None):
+        """
+        The method which is used by the api to count the number of records in the database.
 
         Args:
-            url (str): The connection string which is used to let the api connect with the desired database.
-            It must have the form as described here:
-                http://docs.sqlalchemy.org/en/latest/core/engines.html
-            config (pyramid.config.Configurator): The config of the hosting pyramid application.
-            name (str): The name which is used internally as an identifier of the api, to make it selectable
-                between other api's. This name must be unique all over the application. If not an error will
-                be thrown on application start up.
-            read_method (str): The HTTP method which is used to match the routing to the API.
-            read_filter_method (str): The HTTP method which is used to match the routing to the API.
-            create_method (str): The HTTP method which is used to match the routing to the API.
-            update_method (str): The HTTP method which is used to match the routing to the API.
-            delete_method (str): The HTTP method which is used to match the routing to the API.
+            session (sqlalchemy.orm.Session): The session which is uesed to emit the query.
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client
+            rest_filter (pyramid_georest.lib.rest.Filter or None): The Filter which might be applied to the
+                query in addition.
+            mode (str or None): Whether the records are counted 'exact' or 'estimated'. The count_mode of the
+                service is used if it is None.
+
+        Returns:
+             int: The count of records found in the database.
+        """
+        if mode is None:
+            mode = self.count_mode
+        if mode == COUNT_MODE_ESTIMATED and session.get_bind().dialect.name == 'postgresql':
+            count = self.estimated_count_(session, rest_filter)
+            if count is not None:
+                return count
+        cache_key = None if rest_filter is None else rest_filter.key
+        if self.count_cache is not None:
+            cached = self.count_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        query = session.query(self.orm_model)
+        if rest_filter is not None:
+            query = rest_filter.filter(query)
+        count = query.count()
+        if self.count_cache is not None:
+            self.count_cache.put(cache_key, count)
+        return count
+
+    def estimated_count_(self, session, rest_filter):
+        """
+        Delivers the number of records the PostgreSQL planner expects. Without filter it is taken from the
+        table statistics (pg_class.reltuples), otherwise from the row estimate of the EXPLAIN of the filtered
+        query. Both are only as exact as the last ANALYZE of the table.
+
+        Args:
+            session (sqlalchemy.orm.Session): The session which is uesed to emit the query.
+            rest_filter (pyramid_georest.lib.rest.Filter or None): The Filter which might be applied to the
+                query in addition.
+
+        Returns:
+             int or None: The estimated count or None if the table was never analyzed.
+        """
+        if rest_filter is None:
+            table_name = session.get_bind().dialect.identifier_preparer.format_table(self.orm_model.__table__)
+            reltuples = session.execute(
+                text('SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table_name)'),
+                {'table_name': table_name}
+            ).scalar()
+            # reltuples is -1 (PostgreSQL 14+) or 0 if the table was never analyzed
+            if reltuples is None or reltuples <= 0:
+                return None
+            return int(reltuples)
+        query = rest_filter.filter(session.query(self.orm_model))
+        plan = session.execute(Explain(query.statement)).scalar()
+        if isinstance(plan, six.string_types):
+            plan = simplejson.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def aggregate(self, session, request, group_by, aggregates, rest_filter=None):
+        """
+        The method which is used by the api to aggregate the records in the database. Only the aggregated
+        rows are delivered.
+
+        Args:
+            session (sqlalchemy.orm.Session): The session which is uesed to emit the query.
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client
+            group_by (list of str): The names of the columns the records are grouped by.
+            aggregates (list of tuple): The pairs of aggregate function (see AGGREGATE_FUNCTIONS) and column
+                name. The column name may be None for the count function to count the records.
+            rest_filter (pyramid_georest.lib.rest.Filter or None): The Filter which might be applied to the
+                query in addition.
+
+        Returns:
+             list of dict: The aggregated rows. The values of the group by columns are keyed by their names,
+                the aggregated values by "<function>_<column name>" or "count" for the count of records.
+        """
+        column_classes = self.model_description.column_classes
+        group_columns = [column_classes.get(column_name) for column_name in group_by]
+        labels = list(group_by)
+        expressions = list(group_columns)
+        for function, column_name in aggregates:
+            if column_name is None:
+                labels.append(function)
+                expressions.append(AGGREGATE_FUNCTIONS[function]())
+            else:
+                labels.append('{0}_{1}'.format(function, column_name))
+                expressions.append(AGGREGATE_FUNCTIONS[function](column_classes.get(column_name)))
+        query = session.query(*expressions).select_from(self.orm_model)
+        if rest_filter is not None:
+            query = rest_filter.filter(query)
+        if len(group_columns) > 0:
+            query = query.group_by(*group_columns).order_by(*group_columns)
+        return [dict(zip(labels, row)) for row in query.all()]
+
+    def cluster(self, session, request, bbox, resolution=None, rest_filter=None):
+        """
+        The method which is used by the api to cluster the records inside an extent. The centers of the
+        geometries are snapped to a grid (ST_SnapToGrid) and grouped by their grid cell in the database. Only
+        the center and the number of records of every cluster are delivered, so the size of the result
+        depends on the grid and not on the number of records. This is only supported by PostGIS.
+
+        Args:
+            session (sqlalchemy.orm.Session): The session which is uesed to emit the query.
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client
+            bbox (list of float): The extent (minx, miny, maxx, maxy) the records are clustered in.
+            resolution (float or None): The size of a grid cell in units of the coordinate system. If it is
+                None, the width of the extent is divided into cluster_grid_cells cells.
+            rest_filter (pyramid_georest.lib.rest.Filter or None): The Filter which might be applied to the
+                query in addition.
+
+        Returns:
+             list of dict: The clusters with the coordinates of their center (x, y) and their number of
+                records (count).
+        """
+        query = self.cluster_query_(session, bbox, resolution, rest_filter)
+        return [{'x': x, 'y': y, 'count': count} for x, y, count in query.all()]
+
+    def cluster_query_(self, session, bbox, resolution, rest_filter):
+        """
+        Builds the query of the cluster method. See :py:meth:`cluster` for the arguments.
+
+        Returns:
+             sqlalchemy.orm.query.Query: The query.
 
         Raises:
-            LookupError
+            HTTPBadRequest
         """
-        self.read_method = read_method
-        self.read_filter_method = read_filter_method
-        self.create_method = create_method
-        self.update_method = update_method
-        self.delete_method = delete_method
+        geometry_column_names = self.model_description.geometry_column_names
+        if len(geometry_column_names) == 0:
+            hint_txt = 'The service {name} has no geometry column which could be clustered.'.format(
+                name=self.name
+            )
+            log.error(hint_txt)
+            raise HTTPBadRequest(hint_txt)
+        column_name = geometry_column_names[0]
+        column = self.model_description.column_classes.get(column_name)
+        srid = self.model_description.column_descriptions.get(column_name).get('srid')
+        min_x, min_y, max_x, max_y = bbox
+        if resolution is None:
+            resolution = (max_x - min_x) / self.cluster_grid_cells
+        center = func.ST_Centroid(column)
+        cell = func.ST_SnapToGrid(center, resolution)
+        cluster_center = func.ST_Centroid(func.ST_Collect(center))
+        query = session.query(
+            func.ST_X(cluster_center),
+            func.ST_Y(cluster_center),
+            func.count()
+        ).select_from(self.orm_model)
+        query = query.filter(column.op('&&')(func.ST_MakeEnvelope(min_x, min_y, max_x, max_y, srid)))
+        if rest_filter is not None:
+            query = rest_filter.filter(query)
+        return query.group_by(cell)
 
-        connection_already_exists = False
-        connections = config.registry.pyramid_georest_database_connections
-        for key in connections:
-            if url in key:
-                connection_already_exists = True
-                self.connection = connections[key]
+    def last_modified(self, session, request, rest_filter=None):
+        """
+        Delivers the time of the last modification of the records which match the filter. It is the maximum
+        value of the last_modified_column.
 
-        if not connection_already_exists:
-            self.connection = Connection(url)
-            config.registry.pyramid_georest_database_connections[url] = self.connection
+        Args:
+            session (sqlalchemy.orm.Session): The session which is uesed to emit the query.
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client
+            rest_filter (pyramid_georest.lib.rest.Filter or None): The Filter which might be applied to the
+                query in addition.
 
-        self.services = {}
-        self.name = check_route_prefix(config.route_prefix) + name
-        self.pure_name = name
+        Returns:
+             datetime.date or datetime.datetime or None: The last modification or None if there is no
+                record.
+        """
+        column = self.model_description.column_classes.get(self.last_modified_column)
+        query = session.query(func.max(column)).select_from(self.orm_model)
+        if rest_filter is not None:
+            query = rest_filter.filter(query)
+        return query.scalar()
 
-        if self.name not in config.registry.pyramid_georest_apis:
-            config.registry.pyramid_georest_apis[self.name] = self
-            create_api_routing(config, self)
-            config.commit()
+    def show(self, session, request, primary_keys, expand=None):
+        """
+        The method which is used by the api to read exact one record from the database.
+
+        Args:
+            session (sqlalchemy.orm.Session): The sqlalchemy session object
+            request (pyramid.request.Request): The request which comes all the way through the application
+            from the client
+            primary_keys (list of str): The primary keys which are used to filter the exact element.
+            expand (list of str or None): The names of the relationships which are loaded eagerly. The
+                default of the service is used if it is None.
+
+        Returns:
+             list of sqlalchemy.ext.declarative.DeclarativeMeta: A list of database records found for the
+                request.
+        """
+        result = self.record_by_primary_keys_(session, primary_keys, self.expand_options_(expand))
+        return [result]
+
+    def show_many(self, session, request, primary_keys_list, expand=None):
+        """
+        The method which is used by the api to read several records by their primary keys from the database
+        in one query.
+
+        Args:
+            session (sqlalchemy.orm.Session): The sqlalchemy session object
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client
+            primary_keys_list (list of list): The primary keys of every requested record.
+            expand (list of str or None): The names of the relationships which are loaded eagerly. The
+                default of the service is used if it is None.
+
+        Returns:
+             list of sqlalchemy.ext.declarative.DeclarativeMeta: The records found in the requested order.
+        """
+        return self.records_by_primary_keys_(session, primary_keys_list, self.expand_options_(expand))
+
+    def create(self, session, request, feature, passed_format):
+        """
+        The method which is used by the api to create exact one record in the database.
+
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+            from the client
+            session (sqlalchemy.orm.Session): The sqlalchemy session object
+            feature (dict): The feature which should be created in database.
+            passed_format (str): The format which the feature is constructed of.
+
+        Returns:
+            list of sqlalchemy.ext.declarative.DeclarativeMeta: A list of database records found for the
+                request.
+        """
+        orm_object = self.orm_model()
+        if passed_format == 'json':
+            self.handle_json_(orm_object, feature)
+        elif passed_format == 'geojson':
+            self.handle_geojson_(orm_object, feature)
         else:
-            log.error(
-                "The Api-Object you created seems to already exist in the registry. It has to "
-                "be unique at all. Couldn't be added. Sorry..."
+            hint_text = 'The Format "{format}" is not defined for this service. Sorry...'.format(
+                format=passed_format
+            )
+            log.error(hint_text)
+            raise HTTPNotFound(
+                detail=hint_text
+            )
+        session.add(orm_object)
+        session.flush()
+        return [orm_object]
+
+    def bulk_create(self, session, request, features, passed_format):
+        """
+        The method which is used by the api to create many records in the database. The records are not
+        added to the session one by one. They are inserted in batches of bulk_batch_size records with one
+        core insert statement per batch: A multi row insert which returns the primary keys on PostgreSQL, an
+        executemany on other databases. Geometries are passed as EWKT, so they are converted by the database
+        function of the geometry type once in the statement instead of per value. The features are consumed
+        batch by batch, so they can be delivered by a generator (e.g. while the request body is parsed).
+
+        Args:
+            session (sqlalchemy.orm.Session): The sqlalchemy session object
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client
+            features (iterable of dict): The features which should be created in database.
+            passed_format (str): The format which the features are constructed of.
+
+        Returns:
+            list of dict: The primary keys of the created records (column name and value) in the order of
+                the passed features.
+
+        Raises:
+            HTTPBadRequest
+            HTTPNotFound
+        """
+        if passed_format not in ['json', 'geojson']:
+            hint_text = 'The Format "{format}" is not defined for this service. Sorry...'.format(
+                format=passed_format
+            )
+            log.error(hint_text)
+            raise HTTPNotFound(
+                detail=hint_text
+            )
+        rows = (self.bulk_row_(feature, passed_format) for feature in features)
+        table = self.orm_model.__table__
+        primary_key_columns = list(self.mapper_primary_key)
+        returning = session.get_bind().dialect.name == 'postgresql'
+        identities = []
+        while True:
+            batch = list(itertools.islice(rows, self.bulk_batch_size))
+            if len(batch) == 0:
+                break
+            # rows of one statement need the same columns
+            for keys, group in itertools.groupby(batch, key=lambda row: sorted(row.keys())):
+                group = list(group)
+                passed_keys = all(column.key in keys for column in primary_key_columns)
+                if returning:
+                    result = session.execute(table.insert().values(group).returning(*primary_key_columns))
+                    identities.extend(tuple(row) for row in result)
+                elif passed_keys:
+                    session.execute(table.insert(), group)
+                    identities.extend(
+                        tuple(row[column.key] for column in primary_key_columns) for row in group
+                    )
+                else:
+                    # the generated keys are only known for single inserts
+                    for row in group:
+                        result = session.execute(table.insert(), row)
+                        identities.append(tuple(result.inserted_primary_key))
+        # core statements are not tracked by the session, so the transaction has to be told to commit
+        mark_changed(session)
+        return [
+            dict((column.name, value) for column, value in zip(primary_key_columns, identity))
+            for identity in identities
+        ]
+
+    def bulk_row_(self, feature, passed_format):
+        """
+        Translates a passed feature to the values of a core insert statement. The keys of the feature are
+        the attribute names of the model. Geometries are translated to EWKT.
+
+        Args:
+            feature (dict): The feature which should be created in database.
+            passed_format (str): The format which the feature is constructed of (json or geojson).
+
+        Returns:
+            dict: The values of the record by column key.
+
+        Raises:
+            HTTPBadRequest
+        """
+        columns = class_mapper(self.orm_model).columns
+        if not isinstance(feature, dict):
+            hint_text = 'Every feature has to be an object.'
+            log.error(hint_text)
+            raise HTTPBadRequest(hint_text)
+        if passed_format == 'geojson':
+            values = dict(feature.get('properties') or {})
+            geometry = feature.get('geometry')
+            if geometry is not None:
+                if len(self.model_description.geometry_column_names) == 0:
+                    hint_text = 'The service {name} has no geometry column for the geometry of the ' \
+                                'feature.'.format(name=self.name)
+                    log.error(hint_text)
+                    raise HTTPBadRequest(hint_text)
+                values[self.model_description.geometry_column_names[0]] = asShape(geometry).wkt
+        else:
+            values = feature
+        row = {}
+        for key, value in values.items():
+            if key not in columns:
+                hint_text = 'The attribute "{key}" is not part of the model.'.format(key=key)
+                log.error(hint_text)
+                raise HTTPBadRequest(hint_text)
+            if isinstance(value, str) and key in self.model_description.geometry_column_names and \
+                    not value.upper().startswith('SRID='):
+                value = 'SRID={srid};{wkt}'.format(
+                    srid=self.model_description.column_descriptions.get(key).get('srid'),
+                    wkt=value
+                )
+            row[columns[key].key] = value
+        return row
+
+    def update(self, session, request, primary_keys, feature, passed_format):
+        """
+        The method which is used by the api to update exact one record in the database.
+
+        Args:
+            session (sqlalchemy.orm.Session): The sqlalchemy session object
+            request (pyramid.request.Request): The request which comes all the way through the application
+            from the client
+            primary_keys (list of str): The primary keys which are used to filter the exact element.
+            feature (dict): The feature which should be updated in database.
+            passed_format (str): The format which the feature is constructed of.
+
+        Returns:
+            list of sqlalchemy.ext.declarative.DeclarativeMeta: A list of database records found for the
+                request.
+        """
+        orm_object = self.record_by_primary_keys_(session, primary_keys)
+        if passed_format == 'json':
+            self.handle_json_(orm_object, feature)
+        elif passed_format == 'geojson':
+            self.handle_geojson_(orm_object, feature)
+        else:
+            hint_text = 'The Format "{format}" is not defined for this service. Sorry...'.format(
+                format=passed_format
+            )
+            log.error(hint_text)
+            raise HTTPNotFound(
+                detail=hint_text
+            )
+        session.add(orm_object)
+        session.flush()
+        return [orm_object]
+
+    def delete(self, session, request, primary_keys):
+        """
+        The method which is used by the api to delete exact one record in the database.
+
+        Args:
+            session (sqlalchemy.orm.Session): The sqlalchemy session object
+            request (pyramid.request.Request): The request which comes all the way through the application
+            from the client
+            primary_keys (list of str): The primary keys which are used to filter the exact element.
+
+        Returns:
+             list of sqlalchemy.ext.declarative.DeclarativeMeta: A list of database records found for the
+                request.
+        """
+
+        result = self.record_by_primary_keys_(session, primary_keys)
+        session.delete(result)
+        session.flush()
+        return [result]
+
+    def bulk_update(self, session, request, rest_filter, feature, passed_format):
+        """
+        The method which is used by the api to update all records matching the filter with one UPDATE
+        statement. The records are not loaded.
+
+        Args:
+            session (sqlalchemy.orm.Session): The sqlalchemy session object
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client
+            rest_filter (pyramid_georest.lib.rest.Filter): The filter which selects the records.
+            feature (dict): The values which are set (only the passed attributes are changed).
+            passed_format (str): The format which the feature is constructed of.
+
+        Returns:
+            int: The number of updated records.
+
+        Raises:
+            HTTPBadRequest
+            HTTPNotFound
+        """
+        if passed_format not in ['json', 'geojson']:
+            hint_text = 'The Format "{format}" is not defined for this service. Sorry...'.format(
+                format=passed_format
+            )
+            log.error(hint_text)
+            raise HTTPNotFound(
+                detail=hint_text
+            )
+        values = self.bulk_row_(feature, passed_format)
+        if len(values) == 0:
+            hint_text = 'The feature does not contain any value to update.'
+            log.error(hint_text)
+            raise HTTPBadRequest(hint_text)
+        statement = self.orm_model.__table__.update().where(rest_filter.clause).values(values)
+        return self.affected_rows_(session, session.execute(statement))
+
+    def bulk_delete(self, session, request, rest_filter):
+        """
+        The method which is used by the api to delete all records matching the filter with one DELETE
+        statement. The records are not loaded.
+
+        Args:
+            session (sqlalchemy.orm.Session): The sqlalchemy session object
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client
+            rest_filter (pyramid_georest.lib.rest.Filter): The filter which selects the records.
+
+        Returns:
+            int: The number of deleted records.
+
+        Raises:
+            HTTPBadRequest
+        """
+        statement = self.orm_model.__table__.delete().where(rest_filter.clause)
+        return self.affected_rows_(session, session.execute(statement))
+
+    def affected_rows_(self, session, result):
+        """
+        Checks the number of records changed by a bulk statement against max_affected_rows and marks the
+        session as changed, so the transaction of the request commits it.
+
+        Args:
+            session (sqlalchemy.orm.Session): The sqlalchemy session object
+            result (sqlalchemy.engine.ResultProxy): The result of the executed statement.
+
+        Returns:
+            int: The number of changed records.
+
+        Raises:
+            HTTPBadRequest
+        """
+        affected_rows = result.rowcount
+        if self.max_affected_rows is not None and affected_rows > self.max_affected_rows:
+            # the session is not marked as changed, so the statement is rolled back with the request
+            hint_text = 'The request would change {count} records but only {maximum} are allowed.'.format(
+                count=affected_rows,
+                maximum=self.max_affected_rows
+            )
+            log.error(hint_text)
+            raise HTTPBadRequest(hint_text)
+        mark_changed(session)
+        return affected_rows
+
+    def model(self, request):
+        """
+        The method which is used by the api to deliver a machine readable and serializable description of
+        the underlying database table/model.
+
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                    from the client
+        Returns:
+            pyramid_georest.lib.description.ModelDescription: The model description of this service.
+        """
+
+        return self.model_description
+
+    def adapter(self, request):
+        """
+        The method which is used by the api to deliver a client side usable adapter to handle the REST API.
+
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client
+        Returns:
+            pyramid_georest.lib.description.ModelDescription: The model description of this service.
+        """
+
+        return self.model_description
+
+
+class Api(object):
+
+    def __init__(self, url, config, name, read_method='GET', read_filter_method='POST', create_method='POST',
+                 update_method='PUT', delete_method='DELETE', pool_settings=None, replica_urls=None,
+                 replica_strategy=REPLICA_STRATEGY_ROUND_ROBIN, replica_health_check_interval=30):
+        """
+        A Object which holds the connection to the database and arbitrary numbers of services. It works
+        like a proxy for the request. It decides which service will be finally called by reading
+        the requested url parts and calls the appropriate service method.
+
+        In addition you can implement api wide behaviour like authorization be subclassing this class
+        and adding some pre or post processing to the particular methods.
+
+        Args:
+            url (str): The connection string which is used to let the api connect with the desired database.
+            It must have the form as described here:
+                http://docs.sqlalchemy.org/en/latest/core/engines.html
+            config (pyramid.config.Configurator): The config of the hosting pyramid application.
+            name (str): The name which is used internally as an identifier of the api, to make it selectable
+                between other api's. This name must be unique all over the application. If not an error will
+                be thrown on application start up.
+            read_method (str): The HTTP method which is used to match the routing to the API.
+            read_filter_method (str): The HTTP method which is used to match the routing to the API.
+            create_method (str): The HTTP method which is used to match the routing to the API.
+            update_method (str): The HTTP method which is used to match the routing to the API.
+            delete_method (str): The HTTP method which is used to match the routing to the API.
+            pool_settings (dict or None): The connection pool settings (pool_size, max_overflow,
+                pool_pre_ping, pool_recycle, pool_timeout) which are used when the connection for the url is
+                created. They take precedence over the values found in the pyramid settings under the keys
+                *pyramid_georest.<setting>* and *pyramid_georest.<api name>.<setting>*. Since connections
+                are shared by url, they only apply for the first api which is created for that url.
+            replica_urls (list of str or None): Connection strings of read replicas of the database. If
+                they are present, read, count and show requests are served by one of the replicas while
+                create, update and delete always use the primary connection passed as url.
+            replica_strategy (str): How the replica for a read request is chosen. This is whether
+                'round_robin' or 'least_busy'.
+            replica_health_check_interval (int): The number of seconds the health state of a replica is
+                cached. Unhealthy replicas are skipped, if none is healthy the primary connection is used.
+
+        Raises:
+            LookupError
+        """
+        self.read_method = read_method
+        self.read_filter_method = read_filter_method
+        self.create_method = create_method
+        self.update_method = update_method
+        self.delete_method = delete_method
+
+        connection_settings = pool_settings_from_settings(config.get_settings(), name)
+        if pool_settings is not None:
+            connection_settings.update(pool_settings)
+
+        self.connection = self.connection_from_registry_(config, url, name, connection_settings)
+        self.replica_pool = ReplicaPool(
+            [
+                self.connection_from_registry_(config, replica_url, name, connection_settings)
+                for replica_url in replica_urls or []
+            ],
+            strategy=replica_strategy,
+            health_check_interval=replica_health_check_interval
+        )
+
+        self.services = {}
+        self.name = check_route_prefix(config.route_prefix) + name
+        self.pure_name = name
+
+        if self.name not in config.registry.pyramid_georest_apis:
+            config.registry.pyramid_georest_apis[self.name] = self
+            create_api_routing(config, self)
+            config.commit()
+        else:
+            log.error(
+                "The Api-Object you created seems to already exist in the registry. It has to "
+                "be unique at all. Couldn't be added. Sorry..."
+            )
+            raise LookupError()
+
+    @staticmethod
+    def connection_from_registry_(config, url, name, connection_settings):
+        """
+        Delivers the connection for the passed url from the global connection registry. If it does not exist
+        yet, it is created with the passed settings and added to the registry.
+
+        Args:
+            config (pyramid.config.Configurator): The config of the hosting pyramid application.
+            url (str): The connection string of the database.
+            name (str): The name of the api which asks for the connection.
+            connection_settings (dict): The pool settings which are used to create the connection.
+
+        Returns:
+            pyramid_georest.lib.database.Connection: The connection for the url.
+        """
+        connections = config.registry.pyramid_georest_database_connections
+        # the urls are compared exactly, a url can be a prefix of the url of another database
+        connection = connections.get(url)
+        if connection is not None:
+            if any(connection.pool_settings.get(k) != v for k, v in connection_settings.items()):
+                log.warning(
+                    'The connection for the api "{name}" already exists. The passed pool settings '
+                    '{settings} are not applied.'.format(name=name, settings=connection_settings)
+                )
+            return connection
+        connection = Connection(url, **connection_settings)
+        connections[url] = connection
+        return connection
+
+    def add_service(self, service):
+        """
+        Add's a service to the api.
+
+        Args:
+            service (Service): The service which should be added to the api.
+
+        Raises:
+            LookupError
+        """
+
+        if service.name not in self.services:
+            self.services[service.name] = service
+        else:
+            log.error(
+                "The Service {name} was defined for this API already. Use the defined one.".format(
+                    name=service.name
+                )
+            )
+            raise LookupError()
+
+    def provide_session(self, request, read_only=False):
+        """
+        This method provides a usable SQLAlchemy session instance. It is ensured, that this session is doomed
+        independent from the behavior of the request (it installs a finished listener to the request). If the
+        response is streamed, the session is kept until the response was written completely.
+
+        Args:
+            request (pyramid.request.Request): The request of the pyramid web framework
+            read_only (bool): Whether the session is only used for reading. In this case it is bound to one
+                of the healthy replicas if there are any. Otherwise the primary connection is used.
+        Returns:
+            Session: a usable instance of a SQLAlchemy Session
+        """
+
+        connection = None
+        if read_only:
+            connection = self.replica_pool.choose()
+        if connection is None:
+            connection = self.connection
+        session_instance = connection.session()
+        inner_scoped_session = connection.session
+
+        def finish(successful):
+            if successful:
+                transaction.commit()
+            else:
+                transaction.abort()
+            inner_scoped_session.remove()
+
+        def cleanup(request):
+            if request.exception is None and isinstance(request.response.app_iter, StreamingAppIter):
+                request.response.app_iter.add_close_callback(finish)
+            else:
+                finish(request.exception is None)
+
+        request.add_finished_callback(cleanup)
+
+        return session_instance
+
+    def find_service_by_definition(self, schema_name, table_name):
+        """
+        Little helper method to obtain a service from the api's service list by it's unique schema+table name
+        combination.
+
+        Args:
+            schema_name (str): The database schema name the service is configured for.
+            table_name (str): The database table name the service is configured for.
+        Returns:
+            Service or None: The found service.
+        """
+
+        return self.services.get(Service.name_from_definition(schema_name, table_name))
+
+    def find_service_by_request(self, request):
+        """
+        Little helper method to scrabble the requested service directly from the url which was requested.
+
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client
+
+        Returns:
+            Service: The found service.
+
+        Raises:
+            HTTPNotFound
+        """
+
+        schema_name = request.matchdict['schema_name']
+        table_name = request.matchdict['table_name']
+        service = self.find_service_by_definition(schema_name, table_name)
+        if service is None:
+            hint_text = 'Service with schema {schema_name} and table {table_name} could not be found.'.format(
+                schema_name=schema_name,
+                table_name=table_name
+            )
+            log.error(hint_text)
+            raise HTTPNotFound(
+                detail=hint_text
+            )
+        request.registry.pyramid_georest_requested_service = service
+        return service
+
+    @staticmethod
+    def request_filter_(request, service):
+        """
+        Little helper method to obtain the filter which is passed in the json body of a filter request.
+
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client.
+            service (Service): The service which was requested.
+
+        Returns:
+            Filter or None: The filter or None if the request is no filter request.
+        """
+        if request.method != request.registry.pyramid_georest_requested_api.read_filter_method:
+            return None
+        return Filter(service.model_description, clause_cache=service.filter_cache,
+                      bbox_prefilter=service.bbox_prefilter, **request.json_body.get('filter'))
+
+    @staticmethod
+    def requested_fields_(request, service):
+        """
+        Little helper method to obtain the column names which were requested by the comma separated url
+        parameter *fields*.
+
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client.
+            service (Service): The service which was requested.
+
+        Returns:
+            list of str or None: The requested column names or None if all columns were requested.
+
+        Raises:
+            HTTPBadRequest
+        """
+        fields = request.params.get('fields')
+        if not fields:
+            return None
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+        if len(fields) == 0:
+            return None
+        for field in fields:
+            if not service.model_description.is_valid_column(field):
+                hint_txt = 'The parameter fields has to contain only columns of the model. The passed ' \
+                           'column name was {}'.format(field)
+                log.error(hint_txt)
+                raise HTTPBadRequest(hint_txt)
+        return fields
+
+    @staticmethod
+    def requested_expand_(request, service):
+        """
+        Little helper method to obtain the relationship names which were requested by the comma separated
+        url parameter *expand*.
+
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client.
+            service (Service): The service which was requested.
+
+        Returns:
+            list of str or None: The requested relationship names or None if the parameter was not passed.
+                An empty parameter delivers an empty list, so the default of the service is not used.
+
+        Raises:
+            HTTPBadRequest
+        """
+        expand = request.params.get('expand')
+        if expand is None:
+            return None
+        expand = [name.strip() for name in expand.split(',') if name.strip()]
+        for name in expand:
+            if name not in service.model_description.relationship_descriptions:
+                hint_txt = 'The parameter expand has to contain only relationships of the model. The ' \
+                           'passed name was {}'.format(name)
+                log.error(hint_txt)
+                raise HTTPBadRequest(hint_txt)
+        return expand
+
+    def read(self, request):
+        """
+        The api wide method to receive the read request and passing it to the correct service. At this
+        point it is possible to implement some post or pre processing by overwriting this method.
+        The most common use case for this will be the implementation of an authorisation mechanism which has
+        influence on the whole api. To have influence on special services please see the service class
+        implementations read method.
+
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client.
+
+        Returns:
+            pyramid.response.Response: An pyramid response object
+        """
+        service = self.find_service_by_request(request)
+        request.registry.pyramid_georest_requested_api = self
+        # the same session (and replica) and filter are used for Last-Modified and the records
+        session = self.provide_session(request, read_only=True)
+        rest_filter = self.request_filter_(request, service)
+        last_modified = None
+        if service.last_modified_column is not None:
+            last_modified = service.last_modified(session, request, rest_filter)
+            if self.not_modified_since_(request, last_modified):
+                return self.not_modified_response_(request, service, last_modified)
+        response = self.cached_response_(
+            request,
+            service,
+            functools.partial(self.read_response_, session=session, rest_filter=rest_filter)
+        )
+        if last_modified is not None:
+            response.last_modified = self.http_date_(last_modified)
+        return response
+
+    def read_response_(self, request, service, session, rest_filter):
+        """
+        Reads the records of the read request and renders them (see :py:meth:`read`).
+
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client.
+            service (Service): The requested service.
+            session (sqlalchemy.orm.Session): The session which is used to read the records.
+            rest_filter (Filter or None): The filter of the request.
+
+        Returns:
+            pyramid.response.Response: An pyramid response object
+        """
+        offset = request.params.get('offset')
+        limit = request.params.get('limit')
+        order_by = request.params.get('order_by')
+        direction = request.params.get('direction')
+        if offset and limit:
+            try:
+                offset = int(offset)
+            except ValueError as e:
+                hint_txt = 'Value for offset has to be integer or a string which can be parsed as integer.'
+                log.error(e)
+                log.error(hint_txt)
+                raise HTTPBadRequest(hint_txt)
+            try:
+                limit = int(limit)
+            except ValueError as e:
+                hint_txt = 'Value for limit has to be integer or a string which can be parsed as integer.'
+                log.error(e)
+                log.error(hint_txt)
+                raise HTTPBadRequest(hint_txt)
+        else:
+            offset = None
+            limit = None
+
+        if order_by and direction:
+            if not six.text_type(order_by):
+                hint_txt = 'Value for order_by has to be string.'
+                log.error(hint_txt)
+                raise HTTPBadRequest(hint_txt)
+            if not six.text_type(direction):
+                hint_txt = 'Value for direction has to be string.'
+                log.error(hint_txt)
+                raise HTTPBadRequest(hint_txt)
+            if direction not in DIRECTION_ASC + DIRECTION_DESC:
+                raise HTTPBadRequest(
+                    'The parameter direction has to be one of the values: {0}'.format(
+                        DIRECTION_ASC + DIRECTION_DESC
+                    )
+                )
+            if not service.model_description.is_valid_column(order_by):
+                raise HTTPBadRequest('The parameter order_by has to be one of the models columns. The passed '
+                                     'column name was {}'.format(order_by)
+                                     )
+        else:
+            order_by = None
+            direction = None
+
+        fields = self.requested_fields_(request, service)
+        expand = self.requested_expand_(request, service)
+
+        cursor = request.params.get('cursor')
+        nearest = request.params.get('nearest')
+        if nearest is not None:
+            if cursor is not None:
+                hint_txt = 'The parameter nearest can not be combined with a cursor.'
+                log.error(hint_txt)
+                raise HTTPBadRequest(hint_txt)
+            try:
+                limit = int(request.params.get('limit'))
+            except (TypeError, ValueError) as e:
+                hint_txt = 'Value for limit has to be integer if nearest is passed.'
+                log.error(e)
+                log.error(hint_txt)
+                raise HTTPBadRequest(hint_txt)
+            offset = offset or 0
+            order_by = None
+            direction = None
+
+        with_count = asbool(request.params.get('with_count'))
+        if with_count:
+            if cursor is not None:
+                hint_txt = 'The parameter with_count can not be combined with a cursor.'
+                log.error(hint_txt)
+                raise HTTPBadRequest(hint_txt)
+            results, total_count = service.read_with_count(session, request, rest_filter, offset=offset,
+                                                           limit=limit, order_by=order_by,
+                                                           direction=direction, fields=fields,
+                                                           nearest=nearest, expand=expand)
+            response = service.renderer_proxy.render(request, results, service.model_description,
+                                                     fields=fields)
+            response.headers[TOTAL_COUNT_HEADER] = str(total_count)
+            return response
+
+        if cursor is not None:
+            try:
+                limit = int(request.params.get('limit'))
+            except (TypeError, ValueError) as e:
+                hint_txt = 'Value for limit has to be integer if a cursor is passed.'
+                log.error(e)
+                log.error(hint_txt)
+                raise HTTPBadRequest(hint_txt)
+            results = service.read(session, request, rest_filter, limit=limit, order_by=order_by,
+                                   direction=direction, fields=fields, cursor=cursor, expand=expand)
+            response = service.renderer_proxy.render(request, results, service.model_description,
+                                                     fields=fields)
+            next_cursor = service.next_cursor(results, limit, order_by=order_by, direction=direction)
+            if next_cursor is not None:
+                response.headers[NEXT_CURSOR_HEADER] = next_cursor
+            return response
+
+        passed_format = request.matchdict['format']
+        if service.render_in_database and passed_format in DATABASE_RENDERED_FORMATS and nearest is None:
+            text = service.read_as_text(session, request, passed_format, rest_filter, offset=offset,
+                                        limit=limit, order_by=order_by, direction=direction, fields=fields)
+            return render_json_text(request, text)
+        results = service.read(session, request, rest_filter, offset=offset, limit=limit,
+                               order_by=order_by, direction=direction, fields=fields, nearest=nearest,
+                               expand=expand)
+        return service.renderer_proxy.render(
+            request,
+            results,
+            service.model_description,
+            stream=service.stream,
+            fields=fields
+        )
+
+    def count(self, request):
+        """
+        The api wide method to receive the count request and passing it to the correct service. At this
+        point it is possible to implement some post or pre processing by overwriting this method.
+        The most common use case for this will be the implementation of an authorisation mechanism which has
+        influence on the whole api. To have influence on special services please see the service class
+        implementations read method.
+
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client.
+
+        Returns:
+            pyramid.response.Response: An pyramid response object
+        """
+        service = self.find_service_by_request(request)
+        request.registry.pyramid_georest_requested_api = self
+        session = self.provide_session(request, read_only=True)
+        rest_filter = self.request_filter_(request, service)
+        mode = request.params.get('mode')
+        if mode is not None and mode not in COUNT_MODES:
+            hint_txt = 'Value for mode has to be one of {modes}.'.format(modes=COUNT_MODES)
+            log.error(hint_txt)
+            raise HTTPBadRequest(hint_txt)
+        count = service.count(session, request, rest_filter, mode=mode)
+        return count
+
+    @staticmethod
+    def requested_aggregation_(request, service):
+        """
+        Little helper method to obtain the group by columns and the aggregate functions of an aggregate
+        request. They are passed as *group_by* (list of column names) and *aggregates* (list of objects with
+        *function* and *column_name*) in the json body of a filter request. Otherwise they are read from the
+        url parameters *group_by* (comma separated column names) and *aggregates* (comma separated
+        *function:column_name* pairs). Without aggregates the records are counted.
+
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client.
+            service (Service): The service which was requested.
+
+        Returns:
+            tuple: The list of group by column names and the list of aggregate function and column name
+                pairs.
+
+        Raises:
+            HTTPBadRequest
+        """
+        model_description = service.model_description
+        if request.method == request.registry.pyramid_georest_requested_api.read_filter_method:
+            body = request.json_body
+            group_by = body.get('group_by') or []
+            aggregates = body.get('aggregates') or []
+            if not isinstance(group_by, list) or not isinstance(aggregates, list) or \
+                    not all(isinstance(aggregate, dict) for aggregate in aggregates):
+                hint_txt = 'The group_by and aggregates of the body have to be lists. The passed values ' \
+                           'were {0} and {1}'.format(group_by, aggregates)
+                log.error(hint_txt)
+                raise HTTPBadRequest(hint_txt)
+            aggregates = [
+                (aggregate.get('function'), aggregate.get('column_name')) for aggregate in aggregates
+            ]
+        else:
+            group_by = [
+                column_name.strip() for column_name in request.params.get('group_by', '').split(',')
+                if column_name.strip()
+            ]
+            aggregates = []
+            for aggregate in request.params.get('aggregates', '').split(','):
+                if aggregate.strip():
+                    function, _, column_name = aggregate.strip().partition(':')
+                    aggregates.append((function, column_name or None))
+        if len(aggregates) == 0:
+            aggregates = [('count', None)]
+        for column_name in group_by + [column_name for _, column_name in aggregates if column_name]:
+            if not isinstance(column_name, six.string_types) or \
+                    not model_description.is_valid_column(column_name) or \
+                    model_description.column_descriptions[column_name].get('is_geometry_column'):
+                hint_txt = 'Only non geometric columns of the model can be aggregated. The passed column ' \
+                           'name was {}'.format(column_name)
+                log.error(hint_txt)
+                raise HTTPBadRequest(hint_txt)
+        for function, column_name in aggregates:
+            if function not in AGGREGATE_FUNCTIONS or (column_name is None and function != 'count'):
+                hint_txt = 'The aggregate function "{function}" is not implemented or needs a column.'.format(
+                    function=function
+                )
+                log.error(hint_txt)
+                raise HTTPBadRequest(hint_txt)
+            if function in ['sum', 'avg'] and not Api.is_numeric_column_(model_description, column_name):
+                hint_txt = 'The aggregate function "{function}" needs a numeric column. The passed column ' \
+                           'name was {column_name}'.format(function=function, column_name=column_name)
+                log.error(hint_txt)
+                raise HTTPBadRequest(hint_txt)
+        return group_by, aggregates
+
+    @staticmethod
+    def is_numeric_column_(model_description, column_name):
+        """
+        Checks whether the column holds numbers, which can be summed up and averaged.
+
+        Args:
+            model_description (pyramid_georest.lib.description.ModelDescription): The description of the
+                model.
+            column_name (str): The name of the column.
+
+        Returns:
+            bool: True if the column is numeric.
+        """
+        try:
+            python_type = model_description.column_classes[column_name].type.python_type
+        except NotImplementedError:
+            return False
+        return issubclass(python_type, six.integer_types + (float, decimal.Decimal)) and \
+            not issubclass(python_type, bool)
+
+    def aggregate(self, request):
+        """
+        The api wide method to receive the aggregate request and passing it to the correct service. At this
+        point it is possible to implement some post or pre processing by overwriting this method.
+
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client.
+
+        Returns:
+            pyramid.response.Response: An pyramid response object
+
+        Raises:
+            HTTPNotFound
+        """
+        service = self.find_service_by_request(request)
+        request.registry.pyramid_georest_requested_api = self
+        response_format = request.matchdict['format']
+        if response_format != 'json':
+            hint_text = 'The Format "{format}" is not defined for this service. Sorry...'.format(
+                format=response_format
+            )
+            log.error(hint_text)
+            raise HTTPNotFound(
+                detail=hint_text
+            )
+        session = self.provide_session(request, read_only=True)
+        rest_filter = None
+        if request.method == request.registry.pyramid_georest_requested_api.read_filter_method:
+            filter_definition = request.json_body.get('filter')
+            if filter_definition is not None:
+                rest_filter = Filter(service.model_description, clause_cache=service.filter_cache,
+                                     bbox_prefilter=service.bbox_prefilter, **filter_definition)
+        group_by, aggregates = self.requested_aggregation_(request, service)
+        rows = service.aggregate(session, request, group_by, aggregates, rest_filter)
+        return render_to_response(
+            'geo_restful_aggregate_json',
+            {'rows': rows},
+            request=request
+        )
+
+    def cluster(self, request):
+        """
+        The api wide method to receive the cluster request and passing it to the correct service. At this
+        point it is possible to implement some post or pre processing by overwriting this method.
+
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client.
+
+        Returns:
+            pyramid.response.Response: An pyramid response object
+
+        Raises:
+            HTTPNotFound
+            HTTPBadRequest
+        """
+        service = self.find_service_by_request(request)
+        request.registry.pyramid_georest_requested_api = self
+        response_format = request.matchdict['format']
+        renderer_name = CLUSTER_RENDERERS.get(response_format)
+        if renderer_name is None:
+            hint_text = 'The Format "{format}" is not defined for this service. Sorry...'.format(
+                format=response_format
             )
-            raise LookupError()
+            log.error(hint_text)
+            raise HTTPNotFound(
+                detail=hint_text
+            )
+        try:
+            bbox = [float(value) for value in request.params.get('bbox', '').split(',')]
+            if len(bbox) != 4:
+                raise ValueError('The bbox needs four values.')
+            if bbox[2] <= bbox[0] or bbox[3] <= bbox[1]:
+                raise ValueError('The bbox needs a positive width and height.')
+            resolution = request.params.get('resolution')
+            if resolution is not None:
+                resolution = float(resolution)
+                if resolution <= 0:
+                    raise ValueError('The resolution has to be positive.')
+        except ValueError as e:
+            hint_txt = 'The parameter bbox has to be "minx,miny,maxx,maxy" with minx < maxx and ' \
+                       'miny < maxy and the optional parameter resolution a positive number.'
+            log.error(e)
+            log.error(hint_txt)
+            raise HTTPBadRequest(hint_txt)
+        session = self.provide_session(request, read_only=True)
+        rest_filter = self.request_filter_(request, service)
+        rows = service.cluster(session, request, bbox, resolution, rest_filter)
+        return render_to_response(
+            renderer_name,
+            {'rows': rows},
+            request=request
+        )
 
-    def add_service(self, service):
+    def show(self, request):
         """
-        Add's a service to the api.
+        The api wide method to receive the show request and passing it to the correct service. At this
+        point it is possible to implement some post or pre processing by overwriting this method.
+        The most common use case for this will be the implementation of an authorisation mechanism
+        which has influence on the whole api. To have influence on special services please see the service
+        class implementations show method.
 
         Args:
-            service (Service): The service which should be added to the api.
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client.
 
-        Raises:
-            LookupError
+        Returns:
+            pyramid.response.Response: An pyramid response object
         """
+        service = self.find_service_by_request(request)
+        request.registry.pyramid_georest_requested_api = self
+        return self.cached_response_(request, service, self.show_response_)
 
-        if service.name not in self.services:
-            self.services[service.name] = service
-        else:
-            log.error(
-                "The Service {name} was defined for this API already. Use the defined one.".format(
-                    name=service.name
-                )
-            )
-            raise LookupError()
-
-    def provide_session(self, request):
+    def show_response_(self, request, service):
         """
-        This method provides a usable SQLAlchemy session instance. It is ensured, that this session is doomed
-        independent from the behavior of the request (it installs a finished listener to the request)
+        Reads the record of the show request and renders it (see :py:meth:`show`).
 
         Args:
-            request (pyramid.request.Request): The request of the pyramid web framework
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client.
+            service (Service): The requested service.
+
         Returns:
-            Session: a usable instance of a SQLAlchemy Session
+            pyramid.response.Response: An pyramid response object
         """
+        session = self.provide_session(request, read_only=True)
+        primary_keys = request.matchdict['primary_keys']
+        results = service.show(session, request, primary_keys, self.requested_expand_(request, service))
+        last_modified = None
+        if service.last_modified_column is not None:
+            last_modified = getattr(results[0], service.last_modified_column)
+            if self.not_modified_since_(request, last_modified):
+                return self.not_modified_response_(request, service, last_modified)
+        response = service.renderer_proxy.render(request, results, service.model_description)
+        if last_modified is not None:
+            response.last_modified = self.http_date_(last_modified)
+        return response
 
-        session_instance = self.connection.session()
-        inner_scoped_session = self.connection.session
+    @staticmethod
+    def response_cache_key_(request):
+        """
+        Builds the key of a response in the response cache of a service. It consists of the route, the
+        matched url parts (format, primary keys), the url parameters (paging, ordering, fields, ...), the
+        normalized json body (filter) and the authenticated user id, so users never get the responses of
+        each other. Other request state (e.g. headers or cookies) is not part of the key.
 
-        def cleanup(request):
-            if request.exception is None:
-                transaction.commit()
-            else:
-                transaction.abort()
-            inner_scoped_session.remove()
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client.
 
-        request.add_finished_callback(cleanup)
+        Returns:
+            str: The key.
+        """
+        body = None
+        if request.body:
+            body = request.json_body
+        return simplejson.dumps([
+            request.matched_route.name,
+            request.method,
+            dict(request.matchdict),
+            sorted(request.params.items()),
+            body,
+            request.authenticated_userid
+        ], sort_keys=True)
+
+    def cached_response_(self, request, service, produce_response):
+        """
+        Delivers the response from the response cache of the service if it contains one for the request.
+        Otherwise the response is produced and its body is added to the cache. Streamed responses are never
+        cached.
 
-        return session_instance
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client.
+            service (Service): The requested service.
+            produce_response (callable): The method which produces the response if it is not cached. It
+                receives the request and the service.
 
-    def find_service_by_definition(self, schema_name, table_name):
+        Returns:
+            pyramid.response.Response: An pyramid response object
         """
-        Little helper method to obtain a service from the api's service list by it's unique schema+table name
-        combination.
+        if service.response_cache is None or service.stream:
+            return self.add_etag_(service, produce_response(request, service))
+        key = self.response_cache_key_(request)
+        cached = service.response_cache.get(key)
+        if cached is not None:
+            body, headerlist = cached
+            response = Response(body=body, headerlist=list(headerlist))
+            response.conditional_response = service.conditional_requests
+            return response
+        response = self.add_etag_(service, produce_response(request, service))
+        if response.status_int == 200 and not isinstance(response.app_iter, StreamingAppIter):
+            service.response_cache.put(key, (response.body, list(response.headerlist)))
+        return response
+
+    @staticmethod
+    def add_etag_(service, response):
+        """
+        Adds a strong ETag, which is computed from the body, to the response if the service answers
+        conditional requests. A request with a matching If-None-Match header is answered with 304 then.
+        Streamed responses get no ETag since their body is not known before it was written.
 
         Args:
-            schema_name (str): The database schema name the service is configured for.
-            table_name (str): The database table name the service is configured for.
+            service (Service): The requested service.
+            response (pyramid.response.Response): The response.
+
         Returns:
-            Service or None: The found service.
+            pyramid.response.Response: The response.
         """
+        if service.conditional_requests and response.status_int == 200 and \
+                not isinstance(response.app_iter, StreamingAppIter):
+            response.md5_etag()
+            response.conditional_response = True
+        return response
 
-        return self.services.get(Service.name_from_definition(schema_name, table_name))
-
-    def find_service_by_request(self, request):
+    @staticmethod
+    def http_date_(value):
         """
-        Little helper method to scrabble the requested service directly from the url which was requested.
+        Converts a date or datetime of the database to an aware datetime in UTC with the precision of HTTP
+        dates (seconds). Naive values are taken as UTC.
 
         Args:
-            request (pyramid.request.Request): The request which comes all the way through the application
-                from the client
+            value (datetime.date or datetime.datetime): The value.
 
         Returns:
-            Service: The found service.
+            datetime.datetime: The converted value.
+        """
+        if not isinstance(value, datetime.datetime):
+            value = datetime.datetime(value.year, value.month, value.day)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return value.astimezone(datetime.timezone.utc).replace(microsecond=0)
 
-        Raises:
-            HTTPNotFound
+    def not_modified_since_(self, request, last_modified):
         """
+        Checks whether the client already has the current state because the passed last modification is not
+        newer than the If-Modified-Since header of the request. The header is ignored if the request has an
+        If-None-Match header.
 
-        schema_name = request.matchdict['schema_name']
-        table_name = request.matchdict['table_name']
-        service = self.find_service_by_definition(schema_name, table_name)
-        if service is None:
-            hint_text = 'Service with schema {schema_name} and table {table_name} could not be found.'.format(
-                schema_name=schema_name,
-                table_name=table_name
-            )
-            log.error(hint_text)
-            raise HTTPNotFound(
-                detail=hint_text
-            )
-        request.registry.pyramid_georest_requested_service = service
-        return service
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client.
+            last_modified (datetime.date or datetime.datetime or None): The last modification.
 
-    def read(self, request):
+        Returns:
+            bool: Whether the request can be answered with 304.
         """
-        The api wide method to receive the read request and passing it to the correct service. At this
-        point it is possible to implement some post or pre processing by overwriting this method.
-        The most common use case for this will be the implementation of an authorisation mechanism which has
-        influence on the whole api. To have influence on special services please see the service class
-        implementations read method.
+        if last_modified is None or request.if_modified_since is None or \
+                request.headers.get('If-None-Match') is not None:
+            return False
+        return self.http_date_(last_modified) <= request.if_modified_since
+
+    def not_modified_response_(self, request, service, last_modified):
+        """
+        Builds the 304 response for a request which is not modified since the passed last modification. It
+        carries the Last-Modified header and the ETag of the cached response if the response cache of the
+        service contains one for the request. Otherwise the ETag is unknown since the body was not rendered.
 
         Args:
             request (pyramid.request.Request): The request which comes all the way through the application
                 from the client.
+            service (Service): The requested service.
+            last_modified (datetime.date or datetime.datetime): The last modification.
 
         Returns:
-            pyramid.response.Response: An pyramid response object
-        """
-        service = self.find_service_by_request(request)
-        request.registry.pyramid_georest_requested_api = self
-        session = self.provide_session(request)
-        rest_filter = None
-        if request.method == request.registry.pyramid_georest_requested_api.read_filter_method:
-            rest_filter = Filter(service.model_description, **request.json_body.get('filter'))
-        offset = request.params.get('offset')
-        limit = request.params.get('limit')
-        order_by = request.params.get('order_by')
-        direction = request.params.get('direction')
-        if offset and limit:
-            try:
-                offset = int(offset)
-            except ValueError as e:
-                hint_txt = 'Value for offset has to be integer or a string which can be parsed as integer.'
-                log.error(e)
-                log.error(hint_txt)
-                raise HTTPBadRequest(hint_txt)
-            try:
-                limit = int(limit)
-            except ValueError as e:
-                hint_txt = 'Value for limit has to be integer or a string which can be parsed as integer.'
-                log.error(e)
-                log.error(hint_txt)
-                raise HTTPBadRequest(hint_txt)
-        else:
-            offset = None
-            limit = None
+            pyramid.httpexceptions.HTTPNotModified: The 304 response.
+        """
+        response = HTTPNotModified()
+        response.last_modified = self.http_date_(last_modified)
+        if service.conditional_requests and service.response_cache is not None and not service.stream:
+            cached = service.response_cache.get(self.response_cache_key_(request))
+            if cached is not None:
+                for name, value in cached[1]:
+                    if name.lower() == 'etag':
+                        response.headers['ETag'] = value
+        return response
 
-        if order_by and direction:
-            if not six.text_type(order_by):
-                hint_txt = 'Value for order_by has to be string.'
-                log.error(hint_txt)
-                raise HTTPBadRequest(hint_txt)
-            if not six.text_type(direction):
-                hint_txt = 'Value for direction has to be string.'
-                log.error(hint_txt)
-                raise HTTPBadRequest(hint_txt)
-            if direction not in DIRECTION_ASC + DIRECTION_DESC:
-                raise HTTPBadRequest(
-                    'The parameter direction has to be one of the values: {0}'.format(
-                        DIRECTION_ASC + DIRECTION_DESC
-                    )
-                )
-            if not service.model_description.is_valid_column(order_by):
-                raise HTTPBadRequest('The parameter order_by has to be one of the models columns. The passed '
-                                     'column name was {}'.format(order_by)
-                                     )
-        else:
-            order_by = None
-            direction = None
+    @staticmethod
+    def invalidate_response_cache_(request, service):
+        """
+        Removes all cached responses of the service because its records are changed by the request. The
+        cache is cleared immediately and again after the transaction was finished, so responses which were
+        cached in between are dropped as well.
 
-        results = service.read(session, request, rest_filter, offset=offset, limit=limit,
-                               order_by=order_by, direction=direction)
-        return service.renderer_proxy.render(request, results, service.model_description)
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client.
+            service (Service): The requested service.
+        """
+        if service.response_cache is None:
+            return
+        service.response_cache.clear()
+        request.add_finished_callback(lambda finished_request: service.response_cache.clear())
 
-    def count(self, request):
+    def show_many(self, request):
         """
-        The api wide method to receive the count request and passing it to the correct service. At this
-        point it is possible to implement some post or pre processing by overwriting this method.
-        The most common use case for this will be the implementation of an authorisation mechanism which has
-        influence on the whole api. To have influence on special services please see the service class
-        implementations read method.
+        The api wide method to receive the batched show request and passing it to the correct service. The
+        primary keys of the records are passed as list in the json body under the key *primary_keys*. Every
+        element is a list of the primary key values (or a single value for models with one primary key
+        column).
 
         Args:
             request (pyramid.request.Request): The request which comes all the way through the application
@@ -1006,36 +2883,38 @@ class Api(object):
 
         Returns:
             pyramid.response.Response: An pyramid response object
+
+        Raises:
+            HTTPBadRequest
         """
         service = self.find_service_by_request(request)
         request.registry.pyramid_georest_requested_api = self
-        session = self.provide_session(request)
-        rest_filter = None
-        if request.method == request.registry.pyramid_georest_requested_api.read_filter_method:
-            rest_filter = Filter(service.model_description, **request.json_body.get('filter'))
-        count = service.count(session, request, rest_filter)
-        return count
+        return self.cached_response_(request, service, self.show_many_response_)
 
-    def show(self, request):
+    def show_many_response_(self, request, service):
         """
-        The api wide method to receive the show request and passing it to the correct service. At this
-        point it is possible to implement some post or pre processing by overwriting this method.
-        The most common use case for this will be the implementation of an authorisation mechanism
-        which has influence on the whole api. To have influence on special services please see the service
-        class implementations show method.
+        Reads the records of the batched show request and renders them (see :py:meth:`show_many`).
 
         Args:
             request (pyramid.request.Request): The request which comes all the way through the application
                 from the client.
+            service (Service): The requested service.
 
         Returns:
             pyramid.response.Response: An pyramid response object
         """
-        service = self.find_service_by_request(request)
-        request.registry.pyramid_georest_requested_api = self
-        session = self.provide_session(request)
-        primary_keys = request.matchdict['primary_keys']
-        results = service.show(session, request, primary_keys)
+        primary_keys_list = request.json_body.get('primary_keys')
+        if not isinstance(primary_keys_list, list):
+            hint_txt = 'The json body has to contain the list primary_keys.'
+            log.error(hint_txt)
+            raise HTTPBadRequest(hint_txt)
+        primary_keys_list = [
+            primary_keys if isinstance(primary_keys, list) else [primary_keys]
+            for primary_keys in primary_keys_list
+        ]
+        session = self.provide_session(request, read_only=True)
+        results = service.show_many(session, request, primary_keys_list,
+                                    self.requested_expand_(request, service))
         return service.renderer_proxy.render(request, results, service.model_description)
 
     def create(self, request):
@@ -1059,12 +2938,53 @@ class Api(object):
         passed_format = request.matchdict['format']
         if request.json_body.get('feature'):
             feature = request.json_body.get('feature')
+            self.invalidate_response_cache_(request, service)
             results = service.create(session, request, feature, passed_format)
             request.response.status_int = 201
             return service.renderer_proxy.render(request, results, service.model_description)
         else:
             raise HTTPBadRequest('No features where found in request...')
 
+    def bulk_create(self, request):
+        """
+        The api wide method to receive the bulk create request and passing it to the correct service. The
+        features are passed as json array in the body, as list under the key *features* or as GeoJSON
+        FeatureCollection. The body is parsed incrementally while the features are inserted, so only one
+        batch of features is held in memory. All records are created in the transaction of the request.
+
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client.
+
+        Returns:
+            pyramid.response.Response: An pyramid response object which contains the primary keys of the
+                created records.
+
+        Raises:
+            HTTPBadRequest
+        """
+        service = self.find_service_by_request(request)
+        request.registry.pyramid_georest_requested_api = self
+        session = self.provide_session(request)
+        passed_format = request.matchdict['format']
+        self.invalidate_response_cache_(request, service)
+        try:
+            features = JsonArrayReader(request.body_file).items('features')
+            primary_keys = service.bulk_create(session, request, features, passed_format)
+        except ValueError as e:
+            hint_txt = 'The features could not be read from the request: {error}'.format(error=e)
+            log.error(hint_txt)
+            raise HTTPBadRequest(hint_txt)
+        if len(primary_keys) == 0:
+            raise HTTPBadRequest('No features where found in request...')
+        response = render_to_response(
+            'geo_restful_aggregate_json',
+            {'rows': primary_keys},
+            request=request
+        )
+        response.status_int = 201
+        return response
+
     def delete(self, request):
         """
         The api wide method to receive the delete request and passing it to the correct service.
@@ -1084,6 +3004,7 @@ class Api(object):
         request.registry.pyramid_georest_requested_api = self
         session = self.provide_session(request)
         primary_keys = request.matchdict['primary_keys']
+        self.invalidate_response_cache_(request, service)
         results = service.delete(session, request, primary_keys)
         return service.renderer_proxy.render(request, results, service.model_description)
 
@@ -1109,12 +3030,86 @@ class Api(object):
         passed_format = request.matchdict['format']
         if request.json_body.get('feature'):
             feature = request.json_body.get('feature')
+            self.invalidate_response_cache_(request, service)
             results = service.update(session, request, primary_keys, feature, passed_format)
             request.response.status_int = 202
             return service.renderer_proxy.render(request, results, service.model_description)
         else:
             raise HTTPBadRequest('No features where found in request...')
 
+    @staticmethod
+    def bulk_filter_(request, service):
+        """
+        Little helper method to obtain the mandatory filter of a bulk update or bulk delete request. It is
+        passed as *filter* in the json body.
+
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client.
+            service (Service): The service which was requested.
+
+        Returns:
+            Filter: The filter.
+
+        Raises:
+            HTTPBadRequest
+        """
+        filter_definition = request.json_body.get('filter')
+        if not filter_definition:
+            hint_txt = 'A filter is mandatory to change many records.'
+            log.error(hint_txt)
+            raise HTTPBadRequest(hint_txt)
+        return Filter(service.model_description, clause_cache=service.filter_cache,
+                      bbox_prefilter=service.bbox_prefilter, **filter_definition)
+
+    def bulk_update(self, request):
+        """
+        The api wide method to receive the bulk update request and passing it to the correct service. The
+        filter and the feature with the new values are passed in the json body.
+
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client.
+
+        Returns:
+            int: The number of updated records.
+
+        Raises:
+            HTTPBadRequest
+        """
+        service = self.find_service_by_request(request)
+        request.registry.pyramid_georest_requested_api = self
+        session = self.provide_session(request)
+        passed_format = request.matchdict['format']
+        rest_filter = self.bulk_filter_(request, service)
+        feature = request.json_body.get('feature')
+        if not feature:
+            raise HTTPBadRequest('No features where found in request...')
+        self.invalidate_response_cache_(request, service)
+        return service.bulk_update(session, request, rest_filter, feature, passed_format)
+
+    def bulk_delete(self, request):
+        """
+        The api wide method to receive the bulk delete request and passing it to the correct service. The
+        filter is passed in the json body.
+
+        Args:
+            request (pyramid.request.Request): The request which comes all the way through the application
+                from the client.
+
+        Returns:
+            int: The number of deleted records.
+
+        Raises:
+            HTTPBadRequest
+        """
+        service = self.find_service_by_request(request)
+        request.registry.pyramid_georest_requested_api = self
+        session = self.provide_session(request)
+        rest_filter = self.bulk_filter_(request, service)
+        self.invalidate_response_cache_(request, service)
+        return service.bulk_delete(session, request, rest_filter)
+
     def model(self, request):
         """
         The api wide method to receive the model request and passing it to the correct service.
@@ -1138,13 +3133,13 @@ class Api(object):
         response_format = request.matchdict['format']
         model = service.model(request)
         if response_format == 'json':
-            return render_to_response(
+            response = render_to_response(
                 'geo_restful_model_json',
                 model,
                 request=request
             )
         elif response_format == 'xml':
-            return render_to_response(
+            response = render_to_response(
                 'geo_restful_model_xml',
                 model,
                 request=request
@@ -1157,6 +3152,10 @@ class Api(object):
             raise HTTPNotFound(
                 detail=hint_text
             )
+        # the description only changes with the model, so it can always be validated by its ETag
+        response.md5_etag()
+        response.conditional_response = True
+        return response
 
     def adapter(self, request):
         """
@@ -43,6 +43,30 @@ def create_api_routing(config, api):
         renderer='string'
     )
 
+    # aggregates records/filtered in database
+    config.add_route(
+        '{api_name}/aggregate'.format(api_name=api.name),
+        '/' + api.pure_name + '/{schema_name}/{table_name}/aggregate/{format}'
+    )
+    config.add_view(
+        api,
+        route_name='{api_name}/aggregate'.format(api_name=api.name),
+        attr='aggregate',
+        request_method=(api.read_method, api.read_filter_method)
+    )
+
+    # clusters the records/filtered in database
+    config.add_route(
+        '{api_name}/cluster'.format(api_name=api.name),
+        '/' + api.pure_name + '/{schema_name}/{table_name}/cluster/{format}'
+    )
+    config.add_view(
+        api,
+        route_name='{api_name}/cluster'.format(api_name=api.name),
+        attr='cluster',
+        request_method=(api.read_method, api.read_filter_method)
+    )
+
     # delivers specific record
     config.add_route(
         '{api_name}/show'.format(api_name=api.name),
@@ -55,6 +79,18 @@ def create_api_routing(config, api):
         request_method=api.read_method
     )
 
+    # delivers several specific records
+    config.add_route(
+        '{api_name}/show_many'.format(api_name=api.name),
+        '/' + api.pure_name + '/{schema_name}/{table_name}/show/{format}'
+    )
+    config.add_view(
+        api,
+        route_name='{api_name}/show_many'.format(api_name=api.name),
+        attr='show_many',
+        request_method=api.read_filter_method
+    )
+
     # create specific record
     config.add_route(
         '{api_name}/create'.format(api_name=api.name),
@@ -67,6 +103,18 @@ def create_api_routing(config, api):
         request_method=api.create_method
     )
 
+    # create many records
+    config.add_route(
+        '{api_name}/bulk_create'.format(api_name=api.name),
+        '/' + api.pure_name + '/{schema_name}/{table_name}/bulk_create/{format}'
+    )
+    config.add_view(
+        api,
+        route_name='{api_name}/bulk_create'.format(api_name=api.name),
+        attr='bulk_create',
+        request_method=api.create_method
+    )
+
     # update specific record
     config.add_route(
         '{api_name}/update'.format(api_name=api.name),
@@ -91,6 +139,32 @@ def create_api_routing(config, api):
         request_method=api.delete_method
     )
 
+    # update many records/filtered
+    config.add_route(
+        '{api_name}/bulk_update'.format(api_name=api.name),
+        '/' + api.pure_name + '/{schema_name}/{table_name}/bulk_update/{format}'
+    )
+    config.add_view(
+        api,
+        route_name='{api_name}/bulk_update'.format(api_name=api.name),
+        attr='bulk_update',
+        request_method=api.update_method,
+        renderer='string'
+    )
+
+    # delete many records/filtered
+    config.add_route(
+        '{api_name}/bulk_delete'.format(api_name=api.name),
+        '/' + api.pure_name + '/{schema_name}/{table_name}/bulk_delete'
+    )
+    config.add_view(
+        api,
+        route_name='{api_name}/bulk_delete'.format(api_name=api.name),
+        attr='bulk_delete',
+        request_method=api.delete_method,
+        renderer='string'
+    )
+
     # delivers the description of the desired dataset
     config.add_route(
         '{api_name}/model'.format(api_name=api.name),
@@ -73,6 +73,8 @@ setup(
     zip_safe=False,
     extras_require={
         'testing': tests_require,
+        'orjson': ['orjson'],
+        'ujson': ['ujson']
     },
     install_requires=requires,
     entry_points="""\
@@ -1,7 +1,21 @@
 # -*- coding: utf-8 -*-
 
 import pytest
+import transaction
+from pyramid.config import Configurator
 from pyramid.testing import DummyRequest
+from sqlalchemy import Column, Integer, String, Date
+from sqlalchemy.ext.declarative import declarative_base
+
+Base = declarative_base()
+
+
+class Person(Base):
+    __tablename__ = 'person'
+    __table_args__ = {'schema': 'main'}
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    birthday = Column(Date)
 
 
 class MockRequest(DummyRequest):
@@ -21,3 +35,33 @@ class MockRequest(DummyRequest):
 @pytest.fixture
 def mock_request():
     return MockRequest()
+
+
+@pytest.fixture
+def config():
+    config = Configurator(settings={})
+    config.include('pyramid_georest')
+    return config
+
+
+@pytest.fixture
+def api_factory(config):
+    """
+    Creates an api on an in memory sqlite database which contains the table main.person with 5 records. The
+    keyword arguments are passed to the service.
+    """
+    from webtest import TestApp
+    from pyramid_georest.lib.rest import Api, Service
+
+    def factory(api_kwargs=None, **service_kwargs):
+        api = Api('sqlite://', config, 'api', **(api_kwargs or {}))
+        Base.metadata.create_all(api.connection.engine)
+        session = api.connection.session()
+        session.add_all([Person(id=i, name='Bud {}'.format(i)) for i in range(5)])
+        session.flush()
+        transaction.commit()
+        api.connection.session.remove()
+        api.add_service(Service(Person, **service_kwargs))
+        return TestApp(config.make_wsgi_app())
+
+    return factory
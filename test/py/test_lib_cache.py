@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from pyramid_georest.lib.cache import LRUCache
+
+
+def test_lru_cache():
+    cache = LRUCache(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+    cache.clear()
+    assert cache.get('a', 0) == 0
+
+
+def test_lru_cache_ttl():
+    cache = LRUCache(ttl=0)
+    cache.put('a', 1)
+    assert cache.get('a') is None
+
+
+def test_file_cache(tmpdir):
+    from pyramid_georest.lib.cache import FileCache
+    directory = str(tmpdir.join('responses'))
+    cache = FileCache(directory)
+    cache.put('a', (b'body', [('Content-Type', 'application/json')]))
+    assert FileCache(directory).get('a') == (b'body', [('Content-Type', 'application/json')])
+    assert cache.get('b') is None
+    cache.clear()
+    assert cache.get('a') is None
+
+
+def test_file_cache_eviction(tmpdir):
+    import os
+    import time
+    from pyramid_georest.lib.cache import FileCache
+    directory = str(tmpdir.join('responses'))
+    cache = FileCache(directory, max_size=2)
+    for key in ['a', 'b']:
+        cache.put(key, key)
+        time.sleep(0.01)
+    assert cache.get('a') == 'a'
+    time.sleep(0.01)
+    cache.put('c', 'c')
+    assert cache.get('b') is None
+    assert cache.get('a') == 'a'
+    assert cache.get('c') == 'c'
+    assert len(os.listdir(directory)) == 2
+    expiring = FileCache(directory, ttl=0)
+    expiring.put('d', 'd')
+    assert os.listdir(directory) == []
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 from sqlalchemy.engine import Engine
-from pyramid_georest.lib.database import Connection
+import time
+
+import pytest
+from pyramid_georest.lib.database import Connection, ReplicaPool, pool_settings_from_settings
 from sqlalchemy.orm.session import Session
 
 
@@ -11,3 +14,65 @@ def test_init():
     assert c.url == url
     assert isinstance(c.session(), Session)
     assert isinstance(c.engine, Engine)
+    assert c.pool_settings == {'pool_size': 1}
+
+
+def test_init_pool_settings():
+    c = Connection('sqlite://', pool_size=4, pool_pre_ping=True, pool_recycle=3600)
+    assert c.pool_settings == {'pool_size': 4, 'pool_pre_ping': True, 'pool_recycle': 3600}
+    assert c.engine.pool.size == 4
+    assert c.engine.pool._pre_ping
+    assert c.engine.pool._recycle == 3600
+
+
+def test_pool_settings_from_settings():
+    settings = {
+        'pyramid_georest.pool_size': '5',
+        'pyramid_georest.pool_pre_ping': 'true',
+        'pyramid_georest.test_api.pool_size': '10',
+        'pyramid_georest.test_api.max_overflow': '20',
+        'pyramid_georest.other_api.pool_timeout': '3'
+    }
+    assert pool_settings_from_settings(settings) == {'pool_size': 5, 'pool_pre_ping': True}
+    assert pool_settings_from_settings(settings, 'test_api') == {
+        'pool_size': 10,
+        'max_overflow': 20,
+        'pool_pre_ping': True
+    }
+    assert pool_settings_from_settings(None, 'test_api') == {}
+
+
+def test_replica_pool_round_robin():
+    replicas = [Connection('sqlite://'), Connection('sqlite://')]
+    pool = ReplicaPool(replicas)
+    assert pool.choose() is replicas[0]
+    assert pool.choose() is replicas[1]
+    assert pool.choose() is replicas[0]
+
+
+def test_replica_pool_skips_unhealthy():
+    replicas = [Connection('sqlite://'), Connection('sqlite://')]
+    replicas[0].healthy = False
+    replicas[0].last_health_check = time.time()
+    pool = ReplicaPool(replicas)
+    assert pool.choose() is replicas[1]
+    assert pool.choose() is replicas[1]
+    replicas[1].healthy = False
+    replicas[1].last_health_check = time.time()
+    assert pool.choose() is None
+
+
+def test_replica_pool_empty_and_invalid_strategy():
+    assert ReplicaPool([]).choose() is None
+    assert ReplicaPool([], strategy='least_busy').choose() is None
+    with pytest.raises(ValueError):
+        ReplicaPool([], strategy='random')
+
+
+def test_explain_postgresql():
+    from sqlalchemy import select, table, column
+    from sqlalchemy.dialects import postgresql
+    from pyramid_georest.lib.database import Explain
+    statement = select([column('id')]).select_from(table('person'))
+    sql = str(Explain(statement).compile(dialect=postgresql.dialect()))
+    assert sql == 'EXPLAIN (FORMAT JSON) SELECT id \nFROM person'
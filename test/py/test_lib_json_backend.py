@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import datetime
+import decimal
+
+import pytest
+import simplejson
+
+from pyramid_georest.lib.json_backend import get_json_backend, json_backend_from_settings, \
+    SimpleJsonBackend, JsonArrayReader
+
+
+def test_default_backend():
+    assert isinstance(get_json_backend(), SimpleJsonBackend)
+    assert get_json_backend() is get_json_backend('simplejson')
+    assert json_backend_from_settings(None).name == 'simplejson'
+    assert json_backend_from_settings({}).name == 'simplejson'
+
+
+def test_unknown_backend():
+    assert get_json_backend('unknown').name == 'simplejson'
+
+
+@pytest.mark.parametrize('name', ['simplejson', 'orjson', 'ujson'])
+def test_backends(name):
+    pytest.importorskip(name)
+    backend = json_backend_from_settings({'pyramid_georest.json_backend': name})
+    assert backend.name == name
+    value = {
+        'id': 1,
+        'name': u'Bürglen/Uri',
+        'geometry': backend.raw('{"type": "Point", "coordinates": [1.0, 2.0]}')
+    }
+    for native_type in backend.native_types:
+        if native_type is decimal.Decimal:
+            value['height'] = decimal.Decimal('1.5')
+        else:
+            value['birthday'] = datetime.date(2000, 1, 2)
+    result = simplejson.loads(backend.dumps(value))
+    assert result['name'] == u'Bürglen/Uri'
+    assert result['geometry'] == {'type': 'Point', 'coordinates': [1.0, 2.0]}
+    assert result.get('height', 1.5) == 1.5
+    assert result.get('birthday', '2000-01-02') == '2000-01-02'
+
+
+def test_json_array_reader():
+    import io
+    features = [{'id': i, 'name': u'Bürglen {0}'.format(i), 'height': i * 10} for i in range(20)]
+    document = simplejson.dumps({'type': 'FeatureCollection', 'crs': {'name': 'EPSG:2056'},
+                                 'features': features}).encode('utf-8')
+    assert list(JsonArrayReader(io.BytesIO(document), chunk_size=7).items('features')) == features
+    document = simplejson.dumps(features).encode('utf-8')
+    assert list(JsonArrayReader(io.BytesIO(document), chunk_size=3).items('features')) == features
+    assert list(JsonArrayReader(io.BytesIO(b' [ ] ')).items()) == []
+    # items inside one chunk are decoded at their offset without copying the buffer
+    reader = JsonArrayReader(io.BytesIO(document), chunk_size=len(document) + 1)
+    items = reader.items()
+    next(items)
+    buffer = reader.buffer
+    assert next(items) == features[1]
+    assert reader.buffer is buffer
+    items = JsonArrayReader(io.BytesIO(b'[{"id": 1}, {"id": 2,, {"id": 3}]'), chunk_size=4).items()
+    assert next(items) == {'id': 1}
+    with pytest.raises(ValueError):
+        next(items)
+    stream = io.BytesIO(b'[{"id": 1,, "name": "Bud"}, ' + b'{"id": 2}, ' * 1000 + b'{"id": 3}]')
+    with pytest.raises(ValueError):
+        next(JsonArrayReader(stream, chunk_size=64).items())
+    assert stream.tell() < 1000
+    with pytest.raises(ValueError):
+        JsonArrayReader(io.BytesIO(b'{"type": "FeatureCollection"}')).items('features')
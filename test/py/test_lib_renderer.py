@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+import datetime
+import decimal
+
+import pytest
+import simplejson
+from geoalchemy2 import Geometry
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point
+from sqlalchemy import Column, Integer, String, Date, Numeric
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.util import KeyedTuple
+
+from pyramid_georest.lib.description import ModelDescription
+from pyramid_georest.lib.renderer import RestfulJson, RestfulGeoJson, StreamingAppIter, \
+    DATABASE_GEOJSON_LABEL
+
+Base = declarative_base()
+
+
+class DummyInfo(object):
+    def __init__(self, settings):
+        self.settings = settings
+
+
+class Person(Base):
+    __tablename__ = 'person'
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    birthday = Column(Date)
+    height = Column(Numeric)
+
+
+class Parcel(Base):
+    __tablename__ = 'parcel'
+    id = Column(Integer, primary_key=True)
+    geom = Column(Geometry('POINT', srid=2056))
+
+
+def records(count):
+    return [
+        Person(
+            id=i,
+            name='Bud {}'.format(i),
+            birthday=datetime.date(2000, 1, 1),
+            height=decimal.Decimal('1.8')
+        ) for i in range(count)
+    ]
+
+
+def parcels(count):
+    return [Parcel(id=i, geom=from_shape(Point(i, i + 1), srid=2056)) for i in range(count)]
+
+
+def render(renderer, request, features, stream, model=Person):
+    return renderer({
+        'features': features,
+        'model_description': ModelDescription(model),
+        'stream': stream
+    }, {'request': request})
+
+
+def test_json(mock_request):
+    body = render(RestfulJson(None), mock_request, records(2), False)
+    assert simplejson.loads(body) == [
+        {'id': 0, 'name': 'Bud 0', 'birthday': '2000-01-01', 'height': 1.8},
+        {'id': 1, 'name': 'Bud 1', 'birthday': '2000-01-01', 'height': 1.8}
+    ]
+    assert mock_request.response.content_type == 'application/json'
+
+
+def test_json_stream(mock_request):
+    renderer = RestfulJson(None)
+    renderer.stream_chunk_size = 2
+    for count in [0, 1, 2, 5]:
+        body = render(renderer, mock_request, iter(records(count)), True)
+        assert isinstance(body, StreamingAppIter)
+        chunks = list(body)
+        assert all(isinstance(chunk, bytes) for chunk in chunks)
+        expected = render(renderer, mock_request, records(count), False)
+        assert simplejson.loads(b''.join(chunks)) == simplejson.loads(expected)
+
+
+def test_json_stream_callback(mock_request):
+    mock_request.GET['callback'] = 'cb'
+    body = render(RestfulJson(None), mock_request, iter(records(1)), True)
+    content = b''.join(body)
+    assert content.startswith(b'cb([') and content.endswith(b']);')
+    assert mock_request.response.content_type == 'application/javascript'
+
+
+def test_json_stream_close_callbacks(mock_request):
+    calls = []
+    body = render(RestfulJson(None), mock_request, iter(records(3)), True)
+    body.add_close_callback(calls.append)
+    next(iter(body))
+    body.close()
+    body = render(RestfulJson(None), mock_request, iter(records(3)), True)
+    body.add_close_callback(calls.append)
+    list(body)
+    body.close()
+    assert calls == [False, True]
+
+
+def test_geojson_stream(mock_request):
+    renderer = RestfulGeoJson(None)
+    renderer.stream_chunk_size = 2
+    for count in [0, 1, 3]:
+        body = render(renderer, mock_request, iter(parcels(count)), True, model=Parcel)
+        content = simplejson.loads(b''.join(body))
+        expected = render(renderer, mock_request, parcels(count), False, model=Parcel)
+        assert content == simplejson.loads(expected)
+        assert content['type'] == 'FeatureCollection'
+        assert len(content['features']) == count
+    assert content['features'][2] == {
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [2.0, 3.0]},
+        'properties': {'id': 2}
+    }
+
+
+def test_geojson_database_geometry(mock_request):
+    labels = ['Parcel', DATABASE_GEOJSON_LABEL]
+    rows = [
+        KeyedTuple([Parcel(id=1), '{"type":"Point","coordinates":[1,2]}'], labels),
+        KeyedTuple([Parcel(id=2), None], labels)
+    ]
+    expected = [
+        {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [1, 2]}, 'properties': {'id': 1}},
+        {'type': 'Feature', 'geometry': None, 'properties': {'id': 2}}
+    ]
+    body = render(RestfulGeoJson(None), mock_request, rows, False, model=Parcel)
+    assert simplejson.loads(body)['features'] == expected
+    body = render(RestfulGeoJson(None), mock_request, iter(rows), True, model=Parcel)
+    assert simplejson.loads(b''.join(body))['features'] == expected
+
+
+def test_column_converters():
+    renderer = RestfulJson(None)
+    model_description = ModelDescription(Person)
+    converters = dict(renderer.column_converters(model_description))
+    assert converters['id'] is None
+    assert converters['name'] is None
+    assert converters['birthday'] == renderer.date_formatter
+    assert converters['height'] == renderer.float_formatter
+    assert RestfulJson(None).column_converters(model_description) is \
+        renderer.column_converters(model_description)
+    geojson_converters = dict(RestfulGeoJson(None).column_converters(ModelDescription(Parcel)))
+    assert geojson_converters['geom'].__func__ is RestfulGeoJson.geometry_formatter
+
+
+def test_json_backend_orjson(mock_request):
+    pytest.importorskip('orjson')
+    renderer = RestfulJson(DummyInfo({'pyramid_georest.json_backend': 'orjson'}))
+    assert renderer.json_backend.name == 'orjson'
+    assert dict(renderer.column_converters(ModelDescription(Person)))['birthday'] is None
+    body = render(renderer, mock_request, records(2), False)
+    expected = render(RestfulJson(None), mock_request, records(2), False)
+    assert simplejson.loads(body) == simplejson.loads(expected)
+
+
+def test_cluster_geojson(mock_request):
+    from pyramid_georest.lib.renderer import RestfulClusterGeoJSON
+    rows = [{'x': 1.0, 'y': 2.0, 'count': 3}]
+    body = RestfulClusterGeoJSON(None)({'rows': rows}, {'request': mock_request})
+    assert simplejson.loads(body) == {'type': 'FeatureCollection', 'features': [{
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [1.0, 2.0]},
+        'properties': {'count': 3}
+    }]}
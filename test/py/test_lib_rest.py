@@ -0,0 +1,559 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+import pytest
+from geoalchemy2 import Geometry
+from pyramid.httpexceptions import HTTPBadRequest
+from sqlalchemy import Column, Date, DateTime, Integer, String, ForeignKey, Time, TypeDecorator, \
+    create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker, relationship
+
+from pyramid_georest.lib.renderer import DATABASE_GEOJSON_LABEL
+from pyramid_georest.lib.rest import Service
+
+Base = declarative_base()
+
+
+class Parcel(Base):
+    __tablename__ = 'parcel'
+    __table_args__ = {'schema': 'cadastre'}
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    geom = Column(Geometry('POLYGON', srid=2056))
+
+
+class UpperCase(TypeDecorator):
+    impl = String
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else value.upper()
+
+
+class Tag(Base):
+    __tablename__ = 'tag'
+    id = Column(Integer, primary_key=True)
+    label = Column(UpperCase)
+
+
+class Place(Base):
+    __tablename__ = 'place'
+    __table_args__ = {'schema': 'main'}
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    geom = Column(Geometry('POINT', srid=2056))
+
+
+class Team(Base):
+    __tablename__ = 'team'
+    __table_args__ = {'schema': 'main'}
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    members = relationship('Member')
+
+
+class Member(Base):
+    __tablename__ = 'member'
+    __table_args__ = {'schema': 'main'}
+    id = Column(Integer, primary_key=True)
+    team_id = Column(Integer, ForeignKey('main.team.id'))
+
+
+def test_database_geojson_query():
+    service = Service(Parcel, geojson_in_database=True, geojson_precision=3)
+    query = service.database_geojson_query_(sessionmaker()().query(Parcel))
+    sql = str(query.statement.compile(compile_kwargs={'literal_binds': True}))
+    assert 'ST_AsGeoJSON(cadastre.parcel.geom, 3) AS {}'.format(DATABASE_GEOJSON_LABEL) in sql
+    assert 'ST_AsBinary' not in sql
+    assert 'cadastre.parcel.name' in sql
+
+
+def compile_postgresql(query):
+    return str(query.statement.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+
+
+def test_database_rendered_query_json():
+    service = Service(Parcel, render_in_database=True)
+    query = service.database_rendered_query_(sessionmaker()(), 'json', None, 10, 5, 'name', 'desc')
+    sql = compile_postgresql(query)
+    assert sql.startswith('SELECT CAST(coalesce(json_agg(records ORDER BY records.name DESC)')
+    assert 'ST_AsText(cadastre.parcel.geom) AS geom' in sql
+    assert 'ORDER BY cadastre.parcel.name DESC' in sql
+    assert 'LIMIT 5 OFFSET 10' in sql
+
+
+def test_database_rendered_query_geojson():
+    service = Service(Parcel, render_in_database=True, geojson_precision=2)
+    query = service.database_rendered_query_(sessionmaker()(), 'geojson', None, None, None, None, None)
+    sql = compile_postgresql(query)
+    assert "json_build_object('type', 'FeatureCollection', 'features', coalesce(json_agg(" in sql
+    assert "'geometry', CAST(records.geom AS JSON), 'properties', to_jsonb(records) - 'geom'" in sql
+    assert 'ST_AsGeoJSON(cadastre.parcel.geom, 2) AS geom' in sql
+
+
+def test_connection_from_registry(config):
+    from pyramid_georest.lib.rest import Api
+    other = object()
+    config.registry.pyramid_georest_database_connections['sqlite:///other.db'] = other
+    connection = Api.connection_from_registry_(config, 'sqlite://', 'api', {})
+    assert connection is not other
+    assert Api.connection_from_registry_(config, 'sqlite://', 'api', {}) is connection
+
+
+def test_read(api_factory):
+    app = api_factory()
+    response = app.get('/api/main/person/read/json', params={'order_by': 'id', 'direction': 'desc'})
+    assert [record['id'] for record in response.json] == [4, 3, 2, 1, 0]
+
+
+def test_read_stream(api_factory):
+    app = api_factory(stream=True, stream_chunk_size=2)
+    response = app.get('/api/main/person/read/json', params={'offset': '1', 'limit': '3'})
+    assert [record['id'] for record in response.json] == [1, 2, 3]
+
+
+def test_read_fields(api_factory):
+    app = api_factory()
+    response = app.get('/api/main/person/read/json', params={'fields': 'name,birthday'})
+    assert response.json[0] == {'name': 'Bud 0', 'birthday': None}
+    response = app.get('/api/main/person/read/geojson', params={'fields': 'name'})
+    assert response.json['features'][0]['properties'] == {'name': 'Bud 0'}
+    app.get('/api/main/person/read/json', params={'fields': 'name,unknown'}, status=400)
+
+
+def test_read_cursor(api_factory):
+    app = api_factory()
+    params = {'cursor': '', 'limit': '2', 'order_by': 'name', 'direction': 'desc'}
+    ids = []
+    while True:
+        response = app.get('/api/main/person/read/json', params=params)
+        ids.extend(record['id'] for record in response.json)
+        if 'X-Next-Cursor' not in response.headers:
+            break
+        params['cursor'] = response.headers['X-Next-Cursor']
+    assert ids == [4, 3, 2, 1, 0]
+    params['direction'] = 'asc'
+    app.get('/api/main/person/read/json', params=params, status=400)
+    app.get('/api/main/person/read/json', params={'cursor': 'invalid', 'limit': '2'}, status=400)
+    app.get('/api/main/person/read/json', params={'cursor': ''}, status=400)
+
+
+def test_read_cursor_nullable(api_factory):
+    app = api_factory()
+    connection = app.app.registry.pyramid_georest_apis['api'].connection
+    connection.engine.execute("UPDATE person SET birthday = '2000-01-0' || (5 - id) WHERE id IN (1, 3)")
+
+    def read(direction):
+        params = {'cursor': '', 'limit': '2', 'order_by': 'birthday', 'direction': direction}
+        ids = []
+        while True:
+            response = app.get('/api/main/person/read/json', params=params)
+            ids.extend(record['id'] for record in response.json)
+            if 'X-Next-Cursor' not in response.headers:
+                return ids
+            params['cursor'] = response.headers['X-Next-Cursor']
+
+    assert read('asc') == [3, 1, 0, 2, 4]
+    assert read('desc') == [4, 2, 0, 1, 3]
+
+
+@pytest.mark.parametrize('column_type,value', [
+    (Date(), datetime.date(1899, 12, 31)),
+    (DateTime(), datetime.datetime(2000, 1, 2, 3, 4, 5, 6)),
+    (DateTime(timezone=True), datetime.datetime(2000, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)),
+    (Time(), datetime.time(3, 4, 5))
+])
+def test_keyset_value(column_type, value):
+    column = Column('value', column_type)
+    assert Service.keyset_value_(column, Service.keyset_serializable_(value)) == value
+
+
+def test_count_cache(api_factory):
+    app = api_factory(count_mode='estimated', count_cache_ttl=60, count_cache_size=2)
+    assert app.get('/api/main/person/count').text == '5'
+    connection = app.app.registry.pyramid_georest_apis['api'].connection
+    connection.engine.execute("INSERT INTO person (id, name) VALUES (5, 'Bud 5')")
+    # sqlite has no estimates, the cached exact count is delivered
+    assert app.get('/api/main/person/count', params={'mode': 'exact'}).text == '5'
+    app.get('/api/main/person/count', params={'mode': 'unknown'}, status=400)
+    service = app.app.registry.pyramid_georest_apis['api'].services['main,person']
+    for i in range(3):
+        definition = {'mode': 'AND', 'clauses': [{'column_name': 'id', 'operator': '>', 'value': i}]}
+        app.post_json('/api/main/person/count', {'filter': {'definition': definition}})
+    assert len(service.count_cache) == 2
+
+
+def test_read_with_count(api_factory):
+    app = api_factory()
+    params = {'offset': '1', 'limit': '2', 'with_count': 'true'}
+    response = app.get('/api/main/person/read/json', params=params)
+    assert [record['id'] for record in response.json] == [1, 2]
+    assert response.headers['X-Total-Count'] == '5'
+    params['offset'] = '10'
+    response = app.get('/api/main/person/read/geojson', params=params)
+    assert response.json['features'] == []
+    assert response.headers['X-Total-Count'] == '5'
+
+
+def test_read_with_count_geojson_in_database(config):
+    from sqlalchemy import event
+    from webtest import TestApp
+    from pyramid_georest.lib.rest import Api
+    api = Api('sqlite://', config, 'api')
+    engine = api.connection.engine
+
+    @event.listens_for(engine, 'connect')
+    def connect(connection, record):
+        # geoalchemy2 calls AsGeoJSON on sqlite (spatialite), the database encoded geometry is simulated
+        point = '{"type": "Point", "coordinates": [1, 2]}'
+        connection.create_function('AsGeoJSON', 2, lambda geometry, precision: point)
+
+    # sqlite does not know the geometry type of the model
+    engine.execute('CREATE TABLE main.place (id INTEGER PRIMARY KEY, name VARCHAR, geom BLOB)')
+    engine.execute("INSERT INTO main.place (id, name) VALUES (0, 'Place 0'), (1, 'Place 1'), (2, 'Place 2')")
+    api.add_service(Service(Place, geojson_in_database=True))
+    app = TestApp(config.make_wsgi_app())
+    params = {'offset': '0', 'limit': '2', 'with_count': 'true'}
+    response = app.get('/api/main/place/read/geojson', params=params)
+    assert [feature['properties']['id'] for feature in response.json['features']] == [0, 1]
+    assert response.json['features'][0]['geometry'] == {'type': 'Point', 'coordinates': [1, 2]}
+    assert response.headers['X-Total-Count'] == '3'
+
+
+def test_read_filter_cache(api_factory):
+    app = api_factory(filter_cache_size=128)
+    service = app.app.registry.pyramid_georest_apis['api'].services['main,person']
+
+    def read(name, ids):
+        definition = {'mode': 'OR', 'clauses': [
+            {'column_name': 'name', 'operator': '=', 'value': name},
+            {'column_name': 'id', 'operator': 'IN', 'value': ids}
+        ]}
+        response = app.post_json('/api/main/person/read/json', {'filter': {'definition': definition}})
+        return sorted(record['id'] for record in response.json)
+
+    assert read('Bud 0', '3,4') == [0, 3, 4]
+    assert read('Bud 1', '2,3') == [1, 2, 3]
+    assert len(service.filter_cache) == 1
+    assert read('Bud 1', '2') == [1, 2]
+    assert len(service.filter_cache) == 2
+    assert read('Bud 0', [1, 3]) == [0, 1, 3]
+    assert read('Bud 0', [2, 4]) == [0, 2, 4]
+    # the values are bound, two items share the structure of '2,3'
+    assert len(service.filter_cache) == 2
+
+
+def test_filter_cache_bind_processing():
+    from pyramid_georest.lib.cache import LRUCache
+    from pyramid_georest.lib.rest import Filter
+    engine = create_engine('sqlite://')
+    Tag.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([Tag(id=1, label='red'), Tag(id=2, label='blue')])
+    session.flush()
+    model_description = Service(Tag).model_description
+    definition = {'mode': 'OR', 'clauses': [
+        {'column_name': 'label', 'operator': '=', 'value': 'red'},
+        {'column_name': 'label', 'operator': 'IN', 'value': ['blue']}
+    ]}
+    for clause_cache in [None, LRUCache()]:
+        rest_filter = Filter(model_description, definition, clause_cache=clause_cache)
+        assert sorted(tag.id for tag in rest_filter.filter(session.query(Tag))) == [1, 2]
+    cache = LRUCache()
+    Filter(model_description, definition, clause_cache=cache)
+    rest_filter = Filter(model_description, definition, clause_cache=cache)
+    assert rest_filter.definition is None
+    assert sorted(tag.id for tag in rest_filter.filter(session.query(Tag))) == [1, 2]
+
+
+def test_filter_geometry_collection_input():
+    from pyramid_georest.lib.rest import Filter
+    service = Service(Parcel)
+    definition = {'mode': 'AND', 'clauses': [{
+        'column_name': 'geom',
+        'operator': 'INTERSECTS',
+        'value': 'GEOMETRYCOLLECTION(POINT(1 2), LINESTRING(0 0, 1 1))'
+    }]}
+    rest_filter = Filter(service.model_description, definition)
+    query = rest_filter.filter(sessionmaker()().query(Parcel))
+    sql = str(query.statement.compile(dialect=postgresql.dialect()))
+    assert sql.startswith('WITH anon_1 AS')
+    assert sql.count('ST_GeomFromText(') == 1
+    assert 'GEOMETRYCOLLECTION' not in sql
+    assert sql.count('ST_Intersects(cadastre.parcel.geom, ST_CollectionExtract((SELECT anon_1.geom') == 3
+
+
+def test_filter_bbox():
+    from pyramid_georest.lib.rest import Filter
+    service = Service(Parcel)
+    definition = {'mode': 'AND', 'clauses': [
+        {'column_name': 'geom', 'operator': 'BBOX', 'value': '1,2,3,4'},
+        {'column_name': 'geom', 'operator': 'INTERSECTS', 'value': 'POINT(1 2)'}
+    ]}
+    rest_filter = Filter(service.model_description, definition, bbox_prefilter=True)
+    query = rest_filter.filter(sessionmaker()().query(Parcel))
+    sql = compile_postgresql(query)
+    assert 'cadastre.parcel.geom && ST_MakeEnvelope(1.0, 2.0, 3.0, 4.0, 2056)' in sql
+    assert "(cadastre.parcel.geom && (SELECT anon_1.geom \nFROM anon_1)) AND ST_Intersects" in sql
+    assert sql.count('&&') == 2
+
+
+def test_filter_dwithin():
+    from pyramid_georest.lib.rest import Filter
+    service = Service(Parcel)
+    definition = {'mode': 'AND', 'clauses': [
+        {'column_name': 'geom', 'operator': 'DWITHIN', 'value': 'POINT(1 2)', 'distance': 50}
+    ]}
+    rest_filter = Filter(service.model_description, definition, bbox_prefilter=True)
+    sql = compile_postgresql(rest_filter.filter(sessionmaker()().query(Parcel)))
+    assert "ST_DWithin(cadastre.parcel.geom, ST_GeomFromText('POINT(1 2)', 2056), 50.0)" in sql
+    assert '&&' not in sql
+
+
+def test_read_nearest_query():
+    service = Service(Parcel)
+    query = service.read_query_(sessionmaker()(), None, None, 0, 20, None, None, None, nearest='POINT(1 2)')
+    sql = compile_postgresql(query)
+    assert "ORDER BY cadastre.parcel.geom <-> ST_GeomFromText('POINT(1 2)', 2056)" in sql
+    assert sql.endswith(' LIMIT 20 OFFSET 0')
+    with pytest.raises(HTTPBadRequest):
+        service.nearest_order_('POINT(1 2')
+
+
+def test_read_nearest(api_factory):
+    app = api_factory()
+    app.get('/api/main/person/read/json', params={'nearest': 'POINT(1 2)', 'limit': '2'}, status=400)
+    app.get('/api/main/person/read/json', params={'nearest': 'POINT(1 2)'}, status=400)
+
+
+def test_aggregate(api_factory):
+    app = api_factory()
+    response = app.get('/api/main/person/aggregate/json', params={'aggregates': 'count,min:id,max:id,sum:id'})
+    assert response.json == [{'count': 5, 'min_id': 0, 'max_id': 4, 'sum_id': 10}]
+    body = {
+        'filter': {'definition': {'mode': 'AND', 'clauses': [
+            {'column_name': 'id', 'operator': '>', 'value': 2}
+        ]}},
+        'group_by': ['name'],
+        'aggregates': [{'function': 'avg', 'column_name': 'id'}]
+    }
+    response = app.post_json('/api/main/person/aggregate/json', body)
+    assert response.json == [{'name': 'Bud 3', 'avg_id': 3.0}, {'name': 'Bud 4', 'avg_id': 4.0}]
+    app.get('/api/main/person/aggregate/json', params={'aggregates': 'median:id'}, status=400)
+    app.get('/api/main/person/aggregate/json', params={'group_by': 'unknown'}, status=400)
+    app.get('/api/main/person/aggregate/json', params={'aggregates': 'sum:name'}, status=400)
+    app.get('/api/main/person/aggregate/json', params={'aggregates': 'avg:birthday'}, status=400)
+    app.post_json('/api/main/person/aggregate/json', {'group_by': 'name'}, status=400)
+    app.post_json('/api/main/person/aggregate/json', {'group_by': [['name']]}, status=400)
+    app.post_json('/api/main/person/aggregate/json', {'aggregates': {'function': 'count'}}, status=400)
+    app.get('/api/main/person/aggregate/xml', status=404)
+
+
+def test_cluster_query():
+    service = Service(Parcel, cluster_grid_cells=10)
+    query = service.cluster_query_(sessionmaker()(), [0.0, 0.0, 100.0, 50.0], None, None)
+    sql = compile_postgresql(query)
+    assert 'WHERE cadastre.parcel.geom && ST_MakeEnvelope(0.0, 0.0, 100.0, 50.0, 2056)' in sql
+    assert sql.endswith('GROUP BY ST_SnapToGrid(ST_Centroid(cadastre.parcel.geom), 10.0)')
+    assert 'ST_X(ST_Centroid(ST_Collect(ST_Centroid(cadastre.parcel.geom))))' in sql
+    with pytest.raises(ValueError):
+        Service(Parcel, cluster_grid_cells=0)
+
+
+def test_cluster(api_factory):
+    app = api_factory()
+    app.get('/api/main/person/cluster/geojson', params={'bbox': '0,0,100,50'}, status=400)
+    app.get('/api/main/person/cluster/geojson', params={'bbox': '0,0,100'}, status=400)
+    for bbox in ['100,0,0,50', '0,0,0,50', '0,50,100,0']:
+        response = app.get('/api/main/person/cluster/geojson', params={'bbox': bbox}, status=400)
+        assert 'minx < maxx' in response.text
+    app.get('/api/main/person/cluster/xml', params={'bbox': '0,0,100,50'}, status=404)
+
+
+def test_read_response_cache(api_factory):
+    from pyramid_georest.lib.cache import LRUCache
+    app = api_factory(response_cache=LRUCache(16, ttl=60))
+    params = {'order_by': 'id', 'direction': 'asc'}
+    assert len(app.get('/api/main/person/read/json', params=params).json) == 5
+    connection = app.app.registry.pyramid_georest_apis['api'].connection
+    connection.engine.execute("INSERT INTO person (id, name) VALUES (5, 'Bud 5')")
+    response = app.get('/api/main/person/read/json', params=params)
+    assert len(response.json) == 5
+    assert response.content_type == 'application/json'
+    assert app.get('/api/main/person/read/json/1').json[0]['name'] == 'Bud 1'
+    app.delete('/api/main/person/delete/json/1')
+    assert [record['id'] for record in app.get('/api/main/person/read/json', params=params).json] == \
+        [0, 2, 3, 4, 5]
+
+
+def test_show_many(api_factory):
+    app = api_factory()
+    response = app.post_json('/api/main/person/show/json', {'primary_keys': [3, [1], 42]})
+    assert [record['id'] for record in response.json] == [3, 1]
+    app.post_json('/api/main/person/show/json', {'primary_keys': [[1, 2]]}, status=400)
+    app.post_json('/api/main/person/show/json', {'primary_keys': ['x']}, status=400)
+    app.get('/api/main/person/read/json/42', status=404)
+
+
+def test_bulk_create(api_factory):
+    app = api_factory(bulk_batch_size=2)
+    features = [{'id': 10 + i, 'name': 'Bulk {}'.format(i)} for i in range(3)]
+    response = app.post_json('/api/main/person/bulk_create/json', features, status=201)
+    assert response.json == [{'id': 10}, {'id': 11}, {'id': 12}]
+    response = app.post_json('/api/main/person/bulk_create/geojson', {
+        'type': 'FeatureCollection',
+        'features': [{'type': 'Feature', 'geometry': None, 'properties': {'name': 'Bulk 3'}}]
+    }, status=201)
+    assert response.json == [{'id': 13}]
+    assert app.get('/api/main/person/count').text == '9'
+    app.post_json('/api/main/person/bulk_create/json', [{'unknown': 1}], status=400)
+    app.post_json('/api/main/person/bulk_create/geojson', {
+        'type': 'FeatureCollection',
+        'features': [{
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [1.0, 2.0]},
+            'properties': {'name': 'Bulk 4'}
+        }]
+    }, status=400)
+    app.post_json('/api/main/person/bulk_create/json', {'features': []}, status=400)
+    app.post('/api/main/person/bulk_create/json', b'[{"id": 20}, {"id": 21,]', status=400,
+             content_type='application/json')
+    assert app.get('/api/main/person/count').text == '9'
+
+
+def test_bulk_update_and_delete(api_factory):
+    app = api_factory(max_affected_rows=3)
+    big = {'filter': {'definition': {'mode': 'AND', 'clauses': [
+        {'column_name': 'id', 'operator': '>', 'value': 0}
+    ]}}}
+    small = {'filter': {'definition': {'mode': 'AND', 'clauses': [
+        {'column_name': 'id', 'operator': '>', 'value': 2}
+    ]}}}
+    app.put_json('/api/main/person/bulk_update/json', dict(big, feature={'name': 'Archived'}), status=400)
+    assert app.get('/api/main/person/read/json/1').json[0]['name'] == 'Bud 1'
+    response = app.put_json('/api/main/person/bulk_update/json', dict(small, feature={'name': 'Archived'}))
+    assert response.text == '2'
+    assert app.get('/api/main/person/read/json/4').json[0]['name'] == 'Archived'
+    app.delete_json('/api/main/person/bulk_delete', {}, status=400)
+    assert app.delete_json('/api/main/person/bulk_delete', small).text == '2'
+    assert app.get('/api/main/person/count').text == '3'
+
+
+def test_expand(config, mock_request):
+    import transaction
+    from sqlalchemy import event
+    from webtest import TestApp
+    from pyramid_georest.lib.rest import Api
+    api = Api('sqlite://', config, 'api')
+    engine = api.connection.engine
+    Team.__table__.create(engine)
+    Member.__table__.create(engine)
+    session = api.connection.session()
+    session.add_all([Team(id=i, members=[Member(id=2 * i), Member(id=2 * i + 1)]) for i in range(5)])
+    session.flush()
+    transaction.commit()
+    api.connection.session.remove()
+    api.add_service(Service(Team, expand=['members']))
+    app = TestApp(config.make_wsgi_app())
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+    def queries(service, **kwargs):
+        del statements[:]
+        session = api.connection.session()
+        assert [len(team.members) for team in service.read(session, mock_request, **kwargs)] == [2] * 5
+        api.connection.session.remove()
+        return len(statements)
+
+    assert queries(Service(Team)) == 6
+    assert queries(Service(Team), expand=['members']) == 2
+    assert queries(Service(Team, expand=['members'])) == 2
+    assert queries(Service(Team, expand=['members']), expand=[]) == 6
+    assert queries(Service(Team, expand_strategy='joined'), expand=['members']) == 1
+    with pytest.raises(ValueError):
+        Service(Team, expand=['unknown'])
+    app.get('/api/main/team/read/json', params={'expand': 'members'})
+    app.get('/api/main/team/read/json/1', params={'expand': 'members'})
+    app.get('/api/main/team/read/json', params={'expand': 'unknown'}, status=400)
+
+
+def test_read_response_cache_per_user(config, api_factory):
+    from pyramid.authorization import ACLAuthorizationPolicy
+    from pyramid.security import Everyone
+    from pyramid_georest.lib.cache import LRUCache
+
+    class HeaderAuthenticationPolicy(object):
+        def authenticated_userid(self, request):
+            return request.headers.get('X-User')
+
+        def unauthenticated_userid(self, request):
+            return self.authenticated_userid(request)
+
+        def effective_principals(self, request):
+            return [Everyone, self.authenticated_userid(request)]
+
+        def remember(self, request, userid, **kw):
+            return []
+
+        def forget(self, request):
+            return []
+
+    # the legacy policies are available in pyramid 1 and 2
+    config.set_authentication_policy(HeaderAuthenticationPolicy())
+    config.set_authorization_policy(ACLAuthorizationPolicy())
+    app = api_factory(response_cache=LRUCache(16, ttl=60))
+    assert len(app.get('/api/main/person/read/json', headers={'X-User': 'alice'}).json) == 5
+    connection = app.app.registry.pyramid_georest_apis['api'].connection
+    connection.engine.execute("INSERT INTO person (id, name) VALUES (5, 'Bud 5')")
+    assert len(app.get('/api/main/person/read/json', headers={'X-User': 'alice'}).json) == 5
+    assert len(app.get('/api/main/person/read/json', headers={'X-User': 'bob'}).json) == 6
+
+
+def test_conditional_requests(api_factory):
+    app = api_factory(conditional_requests=True, last_modified_column='birthday')
+    connection = app.app.registry.pyramid_georest_apis['api'].connection
+    connection.engine.execute("UPDATE person SET birthday = '2020-01-01' WHERE id = 2")
+    response = app.get('/api/main/person/read/json')
+    assert response.headers['Last-Modified'] == 'Wed, 01 Jan 2020 00:00:00 GMT'
+    etag = response.headers['ETag']
+    not_modified = app.get('/api/main/person/read/json', headers={'If-None-Match': etag}, status=304)
+    assert not_modified.headers['ETag'] == etag
+    assert not_modified.headers['Last-Modified'] == 'Wed, 01 Jan 2020 00:00:00 GMT'
+    not_modified = app.get('/api/main/person/read/json',
+                           headers={'If-Modified-Since': response.headers['Last-Modified']}, status=304)
+    assert not_modified.headers['Last-Modified'] == 'Wed, 01 Jan 2020 00:00:00 GMT'
+    app.get('/api/main/person/read/json', headers={'If-Modified-Since': 'Tue, 31 Dec 2019 00:00:00 GMT'},
+            status=200)
+    not_modified = app.get('/api/main/person/read/json/2',
+                           headers={'If-Modified-Since': 'Wed, 01 Jan 2020 00:00:00 GMT'}, status=304)
+    assert not_modified.headers['Last-Modified'] == 'Wed, 01 Jan 2020 00:00:00 GMT'
+    response = app.get('/api/main/person/model/json')
+    app.get('/api/main/person/model/json', headers={'If-None-Match': response.headers['ETag']}, status=304)
+    api = app.app.registry.pyramid_georest_apis['api']
+    provide_session = api.provide_session
+    sessions = []
+
+    def counting_provide_session(request, read_only=False):
+        sessions.append(read_only)
+        return provide_session(request, read_only=read_only)
+
+    api.provide_session = counting_provide_session
+    app.get('/api/main/person/read/json')
+    assert sessions == [True]
+    with pytest.raises(ValueError):
+        Service(api.services['main,person'].orm_model, last_modified_column='name')
+
+
+def test_conditional_requests_cached(api_factory):
+    from pyramid_georest.lib.cache import LRUCache
+    app = api_factory(conditional_requests=True, last_modified_column='birthday',
+                      response_cache=LRUCache(16, ttl=60))
+    connection = app.app.registry.pyramid_georest_apis['api'].connection
+    connection.engine.execute("UPDATE person SET birthday = '2020-01-01' WHERE id = 2")
+    response = app.get('/api/main/person/read/json')
+    # the precheck answers before the body is rendered, the ETag is taken from the cached response
+    not_modified = app.get('/api/main/person/read/json',
+                           headers={'If-Modified-Since': response.headers['Last-Modified']}, status=304)
+    assert not_modified.headers['ETag'] == response.headers['ETag']
+    assert not_modified.headers['Last-Modified'] == response.headers['Last-Modified']